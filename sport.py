@@ -1,16 +1,60 @@
 import mss
 import numpy as np
-import pytesseract
-import requests
 import time
 import cv2
 import json
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from speed import metrics, tracing
+from speed.diagnostics import FrameRing
+from speed.sender import Sender
+from speed.stream import Subscription
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# Распознавание: 'tesseract' или 'templates' - встроенное сравнение с
+# шаблонами цифр (быстрее в сотни раз). Шаблоны обучаются на кадрах
+# *-processed.png из дампов диагностики (см. ниже):
+#   python -m speed.recognizer learn digits.npz кадр1.png=1234 кадр2.png=567
+RECOGNIZER = 'tesseract'
+TEMPLATES_PATH = 'digits.npz'
+MIN_CONFIDENCE = 0.6  # ниже - считаем, что число не распознано
+
+if RECOGNIZER == 'templates':
+    from speed.recognizer import TemplateRecognizer
+    recognizer = TemplateRecognizer.load(TEMPLATES_PATH)
+else:
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 # Конфигурация
 SERVER_URL = "http://192.168.100.93:5000/api/data"
-CAPTURE_INTERVAL = 2  # секунды между захватами
+CAPTURE_INTERVAL = 0.1  # секунды между захватами (неизменные кадры не распознаются, см. FrameGate)
+OCR_WORKERS = 3  # процессов распознавания; кадры распознаются параллельно
+REPORT_INTERVAL = 10  # секунды между отчётами о задержках стадий
+STAGE_MAX_ERRORS = 10  # столько ошибок стадии подряд - и мониторинг останавливается
+LANE = 1  # номер колонки (дорожки) на табло для REGION_TO_CAPTURE
+METRICS_PORT = 9105  # порт /metrics для Prometheus; None - не запускать
+# Трассировка: файл Chrome trace (открыть в chrome://tracing или ui.perfetto.dev)
+# со временем каждого распознавания по процессам; None - выключена
+TRACE_FILE = os.environ.get(tracing.ENV)
+
+# Диагностика: последние DIAGNOSTIC_FRAMES кадров (исходный и обработанный)
+# хранятся в памяти и записываются в DIAGNOSTICS_DIR только при сбое
+# распознавания, скачке значения больше MAX_JUMP (не чаще раза в
+# DUMP_COOLDOWN секунд) или по запросу - создайте файл DUMP_TRIGGER
+DIAGNOSTIC_FRAMES = 32
+DIAGNOSTICS_DIR = 'diagnostics'
+MAX_JUMP = 100
+DUMP_COOLDOWN = 30
+DUMP_TRIGGER = 'dump.request'
+
+# Буферизация: отправлять показания пачкой на /api/data/batch, когда их
+# накопилось BATCH_SIZE или самому старому больше BATCH_MAX_AGE секунд.
+# 0 - отправлять каждое показание сразу
+BATCH_SIZE = 0
+BATCH_MAX_AGE = 5.0
 
 # Координаты области для захвата (left, top, width, height)
 # НАСТРОЙТЕ ЭТИ ЗНАЧЕНИЯ ПОД ВАШУ ОБЛАСТЬ!
@@ -22,17 +66,98 @@ REGION_TO_CAPTURE = {
     'height': 20   # Высота области
 }
 
-def capture_region():
-    """Захватывает определенную область экрана"""
-    with mss.mss() as sct:
-        screenshot = sct.grab(REGION_TO_CAPTURE)
-        img = np.array(screenshot)
-        # Конвертируем BGR в RGB
-        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-        return img
+# Области всех считываемых счётчиков: номер дорожки -> область.
+# Все области снимаются одним захватом охватывающего их прямоугольника
+LANE_REGIONS = {
+    LANE: REGION_TO_CAPTURE,
+    # 2: {'left': 750, 'top': 855, 'width': 100, 'height': 20},
+}
+
+# Пропуск распознавания неизменного кадра: кадр уменьшается до CHANGE_GATE_SIZE
+# и сравнивается с последним распознанным по средней абсолютной разности
+# яркости (0-255). Если она не больше CHANGE_THRESHOLD, берём прошлый результат.
+CHANGE_GATE_SIZE = (25, 5)  # (ширина, высота) отпечатка кадра
+CHANGE_THRESHOLD = 0.5  # снимок экрана без шума; смена одной цифры даёт ~2
+CHANGE_MAX_SKIP = 20  # не реже чем раз в столько кадров распознаём всё равно
+
+class FrameGate:
+    """Решает, изменился ли кадр настолько, чтобы его стоило распознавать"""
+
+    def __init__(self, size=CHANGE_GATE_SIZE, threshold=CHANGE_THRESHOLD, max_skip=CHANGE_MAX_SKIP):
+        self.size = size
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.reference = None  # отпечаток последнего распознанного кадра
+        self.skipped = 0
+        self.total_skipped = 0
+        self.passed = 0
+
+    def fingerprint(self, image):
+        gray = cv2.cvtColor(image, to_gray_code(image))
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+    def changed(self, image):
+        fp = self.fingerprint(image)
+        # сравниваем с распознанным кадром, а не с предыдущим, чтобы
+        # медленный дрейф тоже в итоге дошёл до распознавания
+        if (self.reference is None or self.skipped >= self.max_skip
+                or cv2.absdiff(fp, self.reference).mean() > self.threshold):
+            self.reference = fp
+            self.skipped = 0
+            self.passed += 1
+            return True
+        self.skipped += 1
+        self.total_skipped += 1
+        return False
+
+def to_gray_code(image):
+    # снимки mss - BGRA, сохранённые кадры могут быть BGR
+    return cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+
+class ScreenCapture:
+    """Снимает все области дорожек одним захватом.
+
+    Сеанс mss открывается один раз (в потоке, который снимает) и
+    переиспользуется. Захватывается прямоугольник, охватывающий все
+    области, а каждая дорожка получает срез этого снимка без копирования
+    (BGRA). Стоимость захвата не зависит от числа дорожек.
+    """
+
+    def __init__(self, regions=LANE_REGIONS):
+        left = min(r['left'] for r in regions.values())
+        top = min(r['top'] for r in regions.values())
+        right = max(r['left'] + r['width'] for r in regions.values())
+        bottom = max(r['top'] + r['height'] for r in regions.values())
+        self.bbox = {'left': left, 'top': top, 'width': right - left, 'height': bottom - top}
+        self.slices = {lane: (slice(r['top'] - top, r['top'] - top + r['height']),
+                              slice(r['left'] - left, r['left'] - left + r['width']))
+                       for lane, r in regions.items()}
+        self.sct = None
+
+    def grab(self):
+        """Снимок: {дорожка: срез BGRA}"""
+        if self.sct is None:
+            self.sct = mss.mss()
+        shot = self.sct.grab(self.bbox)
+        # каждый снимок - свой буфер, так что срезы остаются верными и после следующего
+        frame = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return {lane: frame[rows, cols] for lane, (rows, cols) in self.slices.items()}
+
+    def close(self):
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
+
+# Буферы предобработки по размеру кадра: выделяются один раз на процесс
+OCR_KERNEL = np.ones((2,2),np.uint8)
+ocr_buffers = {}
 
 def preprocess_image_for_ocr(image):
-    """Улучшает изображение для лучшего распознавания чисел"""
+    """Улучшает изображение для лучшего распознавания чисел.
+
+    Результат - буфер, который перезаписывается следующим вызовом
+    для кадра того же размера.
+    """
     # # Конвертируем в grayscale
     # gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     
@@ -45,24 +170,44 @@ def preprocess_image_for_ocr(image):
     # # Убираем шум
     # kernel = np.ones((2,2), np.uint8)
     # processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    shape = image.shape[:2]
+    buffers = ocr_buffers.get(shape)
+    if buffers is None:
+        buffers = ocr_buffers[shape] = (np.empty(shape, np.uint8), np.empty(shape, np.uint8), np.empty(shape, np.uint8))
+    gray, binary, processed = buffers
+
+    cv2.cvtColor(image, to_gray_code(image), dst=gray)
     
     # Инвертируем изображение (делаем цифры белыми, фон черным)
-    inverted = cv2.bitwise_not(gray)
+    cv2.bitwise_not(gray, dst=gray)
     
     # Применяем пороговое значение
-    _, binary = cv2.threshold(inverted, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=binary)
     
     # Убираем шумы (опционально)
-    kernel = np.ones((2,2),np.uint8)
-    processed = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+    cv2.morphologyEx(binary, cv2.MORPH_OPEN, OCR_KERNEL, dst=processed)
     
     return processed
 
 def extract_number(image):
     """Извлекает число из изображения с улучшенной обработкой"""
-    processed_image = preprocess_image_for_ocr(image)
-    cv2.imwrite('image.png', processed_image)
+    return recognize_frame(image)[1]
+
+@tracing.traced('extract_number')
+def recognize_frame(image):
+    """(обработанный кадр, число или None)"""
+    processed = preprocess_image_for_ocr(image)
+    return processed, read_number(processed)
+
+def read_number(processed_image):
+    """Распознаёт число на обработанном (чёрно-белом) изображении"""
+    if RECOGNIZER == 'templates':
+        number, confidence = recognizer.recognize(processed_image)
+        if number is not None and confidence < MIN_CONFIDENCE:
+            print(f"Низкая уверенность распознавания: {number} ({confidence:.2f})")
+            return None
+        return number
+
     # Конфигурация tesseract для лучшего распознавания чисел
     custom_config = r'--psm 6 outputbase digits'
     
@@ -80,23 +225,14 @@ def extract_number(image):
         print(f"Ошибка распознавания: {e}")
         return None
 
-def send_number_to_server(number):
-    """Отправляет число на сервер"""
-    data = {
-        'digits': [number, 1, 2],
-    }
-    
-    try:
-        response = requests.post(SERVER_URL, json=data, timeout=3)
-        if response.status_code == 200:
-            print(f"✓ Число {number} отправлено успешно")
-            return True
-        else:
-            print(f"✗ Ошибка сервера: {response.status_code}")
-            return False
-    except requests.exceptions.RequestException as e:
-        print(f"✗ Ошибка подключения: {e}")
-        return False
+# Отправка идёт из фонового потока: медленный сервер не тормозит захват.
+# Создаётся в main(): процессы распознавания тоже импортируют этот файл
+sender = None
+
+def send_number_to_server(number, lane=LANE):
+    """Ставит число в очередь на отправку (не блокирует)"""
+    sender.send(lane, number)
+    print(f"✓ Дорожка {lane}: число {number} поставлено в очередь")
 
 def find_region_coordinates():
     """Вспомогательная функция для определения координат области"""
@@ -113,39 +249,329 @@ def find_region_coordinates():
         end_pos = sct.get_pixels(monitor=MONITOR_NUMBER)
         print(f"Координаты: {end_pos}")
 
+def ocr_job(image):
+    """Распознавание в процессе пула: (число, время в мс, обработанный кадр, интервалы трассировки)"""
+    started = time.perf_counter()
+    processed, number = recognize_frame(image)
+    return number, (time.perf_counter() - started) * 1000.0, processed, tracing.drain()
+
+def init_ocr_worker(trace=False):
+    # Ctrl+C обрабатывает главный процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if trace:
+        tracing.enable()  # интервалы уходят в главный процесс вместе с результатом
+
+STAGE_SECONDS = metrics.REGISTRY.histogram(
+    'sport_stage_seconds', "Time spent in each pipeline stage", ['stage'])
+
+class StageStats:
+    """Задержки одной стадии конвейера между отчётами (и в гистограмме /metrics)"""
+
+    def __init__(self, name, metric=None):
+        self.name = name
+        self.metric = metric
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        if self.metric is not None:
+            self.metric.observe(ms / 1000.0)
+        with self.lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def report(self):
+        with self.lock:
+            mean = self.total_ms / self.count if self.count else 0.0
+            line = f"{self.name}: {self.count} шт, среднее {mean:.1f} мс, макс {self.max_ms:.1f} мс"
+            self.reset()
+            return line
+
+class LatestPerLane:
+    """Очередь кадров, где у каждой дорожки ждёт только самый свежий"""
+
+    def __init__(self):
+        self.items = {}
+        self.cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, lane, item):
+        with self.cond:
+            if lane in self.items:
+                self.dropped += 1
+            # дорожка сохраняет место в очереди, меняется только кадр
+            self.items[lane] = item
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """(дорожка, кадр) дольше всех ждущей дорожки или None по таймауту"""
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            lane = next(iter(self.items))
+            return lane, self.items.pop(lane)
+
+class Pipeline:
+    """Захват -> распознавание -> отправка, каждая стадия в своём потоке.
+
+    Стадии связаны очередями, в которых остаётся только самый свежий
+    кадр/результат каждой дорожки: если следующая стадия не успевает,
+    устаревшие данные выбрасываются, а не копятся. Распознавание идёт
+    в пуле процессов, до OCR_WORKERS кадров одновременно.
+    """
+
+    def __init__(self, regions=LANE_REGIONS, workers=OCR_WORKERS, interval=CAPTURE_INTERVAL):
+        self.interval = interval
+        self.workers = workers
+        self.capture = ScreenCapture(regions)
+        self.pool = self.new_pool()
+        self.pool_restarts = 0
+        self.failed = None  # ошибка, из-за которой распознавание остановлено
+        self.slots = threading.Semaphore(workers)
+        self.frames = LatestPerLane()  # кадры на распознавание
+        # (дорожка, номер кадра, время захвата, число, кадры)
+        self.results = Subscription(workers * len(regions))
+        self.rings = {lane: FrameRing(DIAGNOSTIC_FRAMES, os.path.join(DIAGNOSTICS_DIR, f"lane-{lane}"))
+                      for lane in regions}
+        self.stop = threading.Event()
+        self.gates = {lane: FrameGate() for lane in regions}
+        self.last_sent_seq = dict.fromkeys(regions, -1)
+        self.last_number = dict.fromkeys(regions)
+        self.last_value = dict.fromkeys(regions)  # последнее распознанное число
+        self.unrecognized = 0
+        self.ocr_errors = 0
+        self.stage_errors = {'capture': 0, 'send': 0}  # всего
+        self.failing = {'capture': 0, 'send': 0}  # подряд
+        self.ocr_done_jobs = 0
+        self.done_at_restart = 0
+        self.stats = {name: StageStats(name, STAGE_SECONDS.labels(stage)) for name, stage in
+                      (('захват', 'capture'), ('распознавание', 'ocr'),
+                       ('отправка', 'send'), ('кадр -> очередь', 'capture_to_queue'))}
+
+    def new_pool(self):
+        return ProcessPoolExecutor(self.workers, initializer=init_ocr_worker,
+                                   initargs=(tracing.enabled(),))
+
+    def restart_pool(self, error):
+        """Заменить пул, в котором умер процесс; False - если распознавание пора остановить"""
+        # задачи сломанного пула уже завершились с этой ошибкой (см. ocr_done)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        if self.pool_restarts and self.ocr_done_jobs == self.done_at_restart:
+            # новый пул умер, не распознав ни кадра: следующий умрёт так же
+            self.failed = error
+            print(f"❌ Пул распознавания снова сломан ({error}), распознавание остановлено")
+            self.stop.set()
+            return False
+        self.pool_restarts += 1
+        self.done_at_restart = self.ocr_done_jobs
+        print(f"⚠️ Процесс распознавания умер ({error}), пул создан заново")
+        self.pool = self.new_pool()
+        return True
+
+    def stage_failed(self, stage, error):
+        """Ошибка одной итерации стадии: пишем и идём дальше, а после
+        STAGE_MAX_ERRORS подряд останавливаем конвейер (процесс выйдет с кодом 1)"""
+        self.stage_errors[stage] += 1
+        self.failing[stage] += 1
+        print(f"⚠️ Стадия {stage}: {type(error).__name__}: {error}")
+        if self.failing[stage] >= STAGE_MAX_ERRORS:
+            self.failed = error
+            print(f"❌ Стадия {stage}: {STAGE_MAX_ERRORS} ошибок подряд, мониторинг остановлен")
+            self.stop.set()
+
+    def start(self):
+        for target in (self.capture_stage, self.ocr_stage, self.send_stage):
+            threading.Thread(target=target, daemon=True).start()
+
+    def capture_stage(self):
+        seq = 0
+        next_at = time.perf_counter()
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            try:
+                for lane, image in self.capture.grab().items():
+                    if self.gates[lane].changed(image):
+                        seq += 1
+                        self.frames.put(lane, (seq, started, image))
+            except Exception as e:
+                self.stage_failed('capture', e)
+            else:
+                self.failing['capture'] = 0
+                self.stats['захват'].add((time.perf_counter() - started) * 1000.0)
+            # ровный темп: пропущенные такты не догоняем
+            next_at += self.interval
+            now = time.perf_counter()
+            if next_at < now:
+                next_at = now
+            self.stop.wait(next_at - now)
+        self.capture.close()
+
+    def ocr_stage(self):
+        while not self.stop.is_set():
+            # ждём свободный процесс, потом берём самый свежий кадр
+            self.slots.acquire()
+            frame = None
+            while frame is None and not self.stop.is_set():
+                frame = self.frames.get(timeout=0.5)
+            if frame is None:
+                break
+            lane, (seq, captured, image) = frame
+            try:
+                future = self.pool.submit(ocr_job, image)
+            except BrokenProcessPool as e:
+                # кадр пропадает, дальше берём свежий
+                self.slots.release()
+                if not self.restart_pool(e):
+                    break
+                continue
+            future.add_done_callback(lambda f, lane=lane, seq=seq, captured=captured, image=image:
+                                     self.ocr_done(f, lane, seq, captured, image))
+
+    def ocr_done(self, future, lane, seq, captured, image):
+        self.slots.release()
+        if future.cancelled():
+            return
+        try:
+            number, ocr_ms, processed, spans = future.result()
+        except Exception as e:
+            self.ocr_errors += 1
+            print(f"Ошибка распознавания: {e}")
+            return
+        self.ocr_done_jobs += 1
+        self.stats['распознавание'].add(ocr_ms)
+        tracing.merge(spans)
+        self.results.put((lane, seq, captured, number, image, processed))
+
+    def send_stage(self):
+        while not self.stop.is_set():
+            for result in self.results.get(timeout=0.5):
+                try:
+                    self.handle_result(*result)
+                except Exception as e:
+                    self.stage_failed('send', e)
+                else:
+                    self.failing['send'] = 0
+
+    def handle_result(self, lane, seq, captured, number, image, processed):
+        # процессы заканчивают не по порядку: старый кадр после нового не нужен
+        if seq <= self.last_sent_seq[lane]:
+            return
+        self.last_sent_seq[lane] = seq
+        self.rings[lane].record(image, processed, number)
+        if number is None:
+            self.unrecognized += 1
+            print(f"→ Дорожка {lane}: число не распознано")
+            self.dump('ocr-failed', DUMP_COOLDOWN, lanes=[lane])
+            return
+        last_value = self.last_value[lane]
+        if last_value is not None and abs(number - last_value) > MAX_JUMP:
+            print(f"→ Дорожка {lane}: скачок {last_value} -> {number}")
+            self.dump('jump', DUMP_COOLDOWN, lanes=[lane])
+        self.last_value[lane] = number
+        # Отправляем на сервер (только если число изменилось)
+        if number == self.last_number[lane]:
+            return
+        send_number_to_server(number, lane)
+        self.last_number[lane] = number
+        self.stats['кадр -> очередь'].add((time.perf_counter() - captured) * 1000.0)
+
+    def posted(self, seconds):
+        # Sender.on_posted: время самой отправки в потоке отправителя, с повторами
+        self.stats['отправка'].add(seconds * 1000.0)
+
+    def dump(self, reason, min_interval=0.0, lanes=None):
+        for lane in self.rings if lanes is None else lanes:
+            target = self.rings[lane].dump(reason, min_interval)
+            if target is not None:
+                print(f"💾 Кадры диагностики записываются в {target}")
+
+    def report(self):
+        lines = [stats.report() for stats in self.stats.values()]
+        lines.append(f"выброшено устаревших кадров: {self.frames.dropped}, "
+                     f"результатов: {self.results.dropped}, пропущено без изменений: {self.skipped()}")
+        return "\n".join(lines)
+
+    def collect(self):
+        """Счётчики для /metrics (см. speed.metrics.Registry.add_collector)"""
+        lanes = sorted(self.gates)
+        yield ('sport_frames_recognized_total', 'counter', "Frames sent to recognition",
+               [({'lane': str(lane)}, self.gates[lane].passed) for lane in lanes])
+        yield ('sport_frames_unchanged_total', 'counter', "Frames skipped as unchanged",
+               [({'lane': str(lane)}, self.gates[lane].total_skipped) for lane in lanes])
+        yield ('sport_dropped_total', 'counter', "Stale frames and results replaced by newer ones",
+               [({'queue': 'frames'}, self.frames.dropped), ({'queue': 'results'}, self.results.dropped)])
+        yield ('sport_unrecognized_total', 'counter', "Frames with no number recognized",
+               [({}, self.unrecognized)])
+        yield ('sport_ocr_errors_total', 'counter', "Recognition jobs that raised",
+               [({}, self.ocr_errors)])
+        yield ('sport_ocr_pool_restarts_total', 'counter', "Recognition pools replaced after a worker died",
+               [({}, self.pool_restarts)])
+        yield ('sport_stage_errors_total', 'counter', "Capture and send stage iterations that raised",
+               [({'stage': stage}, count) for stage, count in self.stage_errors.items()])
+        if sender is not None:
+            stats = sender.stats()
+            yield ('sport_readings_total', 'counter', "Readings by delivery outcome",
+                   [({'outcome': k}, stats[k]) for k in ('sent', 'dropped', 'failed')])
+            yield ('sport_readings_pending', 'gauge', "Readings waiting to be sent",
+                   [({}, stats['pending'])])
+
+    def recognized(self):
+        return sum(gate.passed for gate in self.gates.values())
+
+    def skipped(self):
+        return sum(gate.total_skipped for gate in self.gates.values())
+
+    def close(self):
+        self.stop.set()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
 def main():
+    global sender
     print("Запуск мониторинга числа...")
-    print(f"Область захвата: {REGION_TO_CAPTURE}")
+    for lane, region in LANE_REGIONS.items():
+        print(f"Область захвата дорожки {lane}: {region}")
     # print(f"Сервер: {SERVER_URL}")
     print("Для остановки нажмите Ctrl+C\n")
-    
-    last_successful_number = None
-    
+
+    if TRACE_FILE:
+        tracing.enable(TRACE_FILE)
+        print(f"Трассировка будет записана в {TRACE_FILE} при остановке")
+    pipeline = Pipeline()
+    sender = Sender(SERVER_URL, coalesce=not BATCH_SIZE, batch_size=BATCH_SIZE, max_age=BATCH_MAX_AGE,
+                    on_posted=pipeline.posted)
+    pipeline.start()
+    if METRICS_PORT is not None:
+        metrics.REGISTRY.add_collector(pipeline.collect)
+        metrics.serve(METRICS_PORT)
+        print(f"Метрики: http://localhost:{METRICS_PORT}/metrics")
+
     try:
-        while True:
-            # 1. Захватываем область
-            image = capture_region()
-            
-            # 2. Распознаем число
-            number = extract_number(image)
-            
-            if number is not None:
-                # 3. Отправляем на сервер (только если число изменилось)
-                if number != last_successful_number:
-                    send_number_to_server(number)
-                    print(number)
-                else:
-                    print(f"→ Число {number} не изменилось")
-            else:
-                print("→ Число не распознано")
-            
-            # Сохраняем скриншот для отладки (опционально)
-            cv2.imwrite('last_capture.png', image)
-            
-            time.sleep(CAPTURE_INTERVAL)
-            
+        next_report = time.monotonic() + REPORT_INTERVAL
+        while not pipeline.stop.wait(1):
+            if os.path.exists(DUMP_TRIGGER):
+                os.remove(DUMP_TRIGGER)
+                pipeline.dump('request')
+            if time.monotonic() >= next_report:
+                next_report += REPORT_INTERVAL
+                print(pipeline.report())
+
     except KeyboardInterrupt:
         print("\nОстановка мониторинга")
+    pipeline.close()
+    sender.close()
+    stats = sender.stats()
+    print(f"Отправлено: {stats['sent']}, отброшено: {stats['dropped']}, ошибок: {stats['failed']}")
+    print(f"Распознано кадров: {pipeline.recognized()}, пропущено без изменений: {pipeline.skipped()}")
+    if pipeline.failed is not None:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
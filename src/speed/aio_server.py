@@ -0,0 +1,261 @@
+"""Production ingest server on stdlib asyncio streams.
+
+Serves the same /api/data contract as the Flask app (POST a reading, POST
+/api/data/batch, GET the latest values with ETag/since/long-poll support)
+on top of the same Ingest store.
+Connections are HTTP/1.1 keep-alive by default, pipelined requests are
+answered in order, and responses are only drained once the socket buffer
+fills up, so one event loop thread can carry thousands of sensor
+connections.
+
+The Flask app stays the default in main(); pick this one with
+--server asyncio. It also serves /api/history and /metrics, but not
+/api/stream.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl
+
+from speed.history import parse_history_query
+from speed.ingest import HANDLER_SECONDS, Ingest, parse_batch, parse_reading
+from speed.metrics import CONTENT_TYPE, REGISTRY, timed
+from speed.tracing import traced
+from speed.store import parse_query
+
+GET_DATA_SECONDS = HANDLER_SECONDS.labels('get_data')
+
+MAX_HEADER = 16 * 1024
+MAX_BODY = 1024 * 1024
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _response(status, body, keep_alive, extra=b'', content_type=b'application/json'):
+    head = (b'HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n%s%s\r\n'
+            % (status, REASONS[status].encode(), content_type, len(body), extra,
+               b'' if keep_alive else b'Connection: close\r\n'))
+    return head + body
+
+
+def _json(obj):
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _json_object(body):
+    # a request body as a dict; ValueError (incl. JSONDecodeError) for anything else
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+class AsyncIngestServer:
+    def __init__(self, ingest=None, host='0.0.0.0', port=65500):
+        self.ingest = ingest if ingest is not None else Ingest()
+        self.host = host
+        self.port = port
+        self.server = None
+        self._handlers = set()  # tasks serving open connections
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                 backlog=4096, limit=MAX_HEADER)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self, on_bound=None):
+        if self.server is None:
+            await self.start()
+        if on_bound is not None:
+            on_bound()
+        print(f"🚀 Starting asyncio ingest server on http://localhost:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stop accepting, end open connections and wait for their handlers.
+
+        Run it on the server's own loop (asyncio.run_coroutine_threadsafe
+        from another thread) before stopping that loop.
+        """
+        self.server.close()
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def route(self, method, path, body):
+        """Return (status, JSON body bytes) for one request."""
+        path, _, query = path.partition('?')
+        if path == '/api/history':
+            if method != 'GET':
+                return 405, _json({'error': 'Method not allowed'})
+            return self.get_history(query)
+        if path == '/api/data':
+            if method == 'POST':
+                return self.receive_data(body)
+            return 405, _json({'error': 'Method not allowed'})
+        if path == '/api/data/batch':
+            if method != 'POST':
+                return 405, _json({'error': 'Method not allowed'})
+            return self.receive_batch(body)
+        return 404, _json({'error': 'Not found'})
+
+    @timed(HANDLER_SECONDS.labels('receive_data'))
+    @traced()
+    def receive_data(self, body):
+        try:
+            reading = parse_reading(_json_object(body))
+        except ValueError:
+            return 400, _json({'error': 'Invalid JSON'})
+        if reading is None:
+            return 400, _json({'error': 'Invalid data format'})
+        self.ingest.accept(*reading)
+        return 200, _json({'status': 'success', 'received_digits': list(reading[:2])})
+
+    @timed(HANDLER_SECONDS.labels('receive_batch'))
+    def receive_batch(self, body):
+        try:
+            samples, error = parse_batch(_json_object(body))
+        except ValueError:
+            return 400, _json({'error': 'Invalid JSON'})
+        if error is not None:
+            return 400, _json(error)
+        accept = self.ingest.accept
+        for sample in samples:
+            accept(*sample)
+        return 200, _json({'status': 'success', 'accepted': len(samples)})
+
+    @timed(HANDLER_SECONDS.labels('get_history'))
+    def get_history(self, query):
+        try:
+            lane, start, end, step = parse_history_query(dict(parse_qsl(query)))
+            return 200, _json(self.ingest.history.query(lane, start, end, step))
+        except ValueError as e:
+            return 400, _json({'error': str(e)})
+
+    async def get_data(self, path, if_none_match):
+        """GET /api/data with If-None-Match, ?since= and ?wait= (see SnapshotStore)."""
+        started = time.perf_counter()
+        try:
+            return await self._get_data(path, if_none_match)
+        finally:
+            GET_DATA_SECONDS.observe(time.perf_counter() - started)
+
+    async def _get_data(self, path, if_none_match):
+        store = self.ingest.store
+        query = dict(parse_qsl(path.partition('?')[2]))
+        try:
+            since, wait = parse_query(query)
+        except ValueError as e:
+            return 400, _json({'error': str(e)}), b''
+        if wait:
+            known = store.known_seq(if_none_match, since)
+            if known is not None:
+                await store.async_wait(known, wait)
+        status, etag, body = store.response(if_none_match, since)
+        return status, body, b'ETag: %s\r\n' % etag.encode()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        transport = writer.transport
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break  # client closed between requests
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(413, _json({'error': 'Headers too large'}), False))
+                    break
+
+                lines = head.split(b'\r\n')
+                try:
+                    method, path, version = lines[0].decode('latin-1').split(' ', 2)
+                except ValueError:
+                    writer.write(_response(400, _json({'error': 'Bad request line'}), False))
+                    break
+                keep_alive = version == 'HTTP/1.1'
+                length = None
+                if_none_match = None
+                for line in lines[1:]:
+                    name, _, value = line.partition(b':')
+                    name = name.strip().lower()
+                    if name == b'content-length':
+                        value = value.strip()
+                        length = int(value) if value.isdigit() else -1
+                    elif name == b'connection':
+                        value = value.strip().lower()
+                        if value == b'close':
+                            keep_alive = False
+                        elif value == b'keep-alive':
+                            keep_alive = True
+                    elif name == b'if-none-match':
+                        if_none_match = value.strip().decode('latin-1')
+                    elif name == b'transfer-encoding':
+                        # chunked uploads are not supported by this server
+                        writer.write(_response(411, _json({'error': 'Content-Length required'}), False))
+                        return
+                if length is None:
+                    if method == 'POST':
+                        # a body may follow, and there is no telling where it ends
+                        writer.write(_response(411, _json({'error': 'Content-Length required'}), False))
+                        break
+                    length = 0
+                if length < 0:
+                    writer.write(_response(400, _json({'error': 'Bad Content-Length'}), False))
+                    break
+                if length > MAX_BODY:
+                    writer.write(_response(413, _json({'error': 'Body too large'}), False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                extra = b''
+                content_type = b'application/json'
+                try:
+                    route = path.partition('?')[0]
+                    if method == 'GET' and route == '/api/data':
+                        status, payload, extra = await self.get_data(path, if_none_match)
+                    elif method == 'GET' and route == '/metrics':
+                        status, payload, content_type = 200, REGISTRY.render().encode(), CONTENT_TYPE.encode()
+                    else:
+                        status, payload = self.route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, _json({'error': str(e)})
+                if keep_alive and version != 'HTTP/1.1':
+                    # HTTP/1.0 closes unless told the connection stays open
+                    extra += b'Connection: keep-alive\r\n'
+                writer.write(_response(status, payload, keep_alive, extra, content_type))
+
+                if not keep_alive:
+                    break
+                # let pipelined requests queue up responses; only wait for the
+                # peer when it is not reading them
+                if transport.get_write_buffer_size() > 64 * 1024:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # close() ends connections this way; returning instead of
+            # re-raising keeps start_server from logging it as an error
+            pass
+        finally:
+            self._handlers.discard(task)
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def start_async_server(ingest=None, host='0.0.0.0', port=65500, on_bound=None):
+    """Run the asyncio ingest server (blocking) in its own event loop.
+
+    on_bound is called once the port is bound, before serving.
+    """
+    asyncio.run(AsyncIngestServer(ingest, host, port).serve_forever(on_bound))
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sys
+import threading
+
+from PySide6.QtCore import QRectF, QSize, QStandardPaths, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+def background_asset(directory=''):
+    """The background for this platform: bg_mac.png on macOS, else bg.png."""
+    if sys.platform == 'darwin':
+        mac = os.path.join(directory, 'bg_mac.png')
+        if os.path.exists(mac):
+            return mac
+    return os.path.join(directory, 'bg.png')
+
+
+def cache_dir():
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation), 'speed')
+
+
+class BackgroundWidget(QWidget):
+    """Central widget that paints a pre-scaled background image.
+
+    The asset is scaled once to the widget's size in device pixels and
+    painted as a plain pixmap blit of only the exposed rectangle, so a
+    digit repaint costs a copy of the pixels under that digit. Scaled
+    images are kept in the user cache directory, keyed by the source
+    file and the target resolution, and reused on later starts.
+    first_paint is emitted once, after the first frame has been painted.
+    """
+
+    first_paint = Signal()
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._source = None
+        self._pixmap = None
+        self._size = QSize()
+        self._painted = False
+        # we paint every pixel ourselves; skip Qt's erase
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def loaded(self):
+        """True if the asset exists and is a readable image (without decoding it)."""
+        return QImageReader(self.path).canRead()
+
+    def source(self):
+        if self._source is None:
+            self._source = QImage(self.path)
+        return self._source
+
+    def _cache_path(self, size):
+        stat = os.stat(self.path)
+        key = hashlib.sha1(f"{os.path.abspath(self.path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        return os.path.join(cache_dir(), f"{name}-{key}-{size.width()}x{size.height()}.png")
+
+    def scaled(self, size):
+        """The background at size device pixels, from the disk cache if present."""
+        try:
+            cached = self._cache_path(size)
+        except OSError:
+            return QImage()
+        image = QImage(cached)
+        if image.size() == size:
+            return image
+        source = self.source()
+        if source.isNull():
+            return image
+        image = source.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio,
+                              Qt.TransformationMode.SmoothTransformation)
+        # PNG encoding takes longer than the scaling; keep it off the GUI thread
+        threading.Thread(target=_save, args=(image.copy(), cached), daemon=True).start()
+        return image
+
+    def _ensure_pixmap(self):
+        dpr = self.devicePixelRatioF()
+        size = QSize(round(self.width() * dpr), round(self.height() * dpr))
+        if size != self._size:
+            self._size = size
+            image = self.scaled(size)
+            self._pixmap = None if image.isNull() else QPixmap.fromImage(image)
+            if self._pixmap is not None:
+                self._pixmap.setDevicePixelRatio(dpr)
+        return self._pixmap
+
+    def paintEvent(self, event):
+        rect = event.rect()
+        painter = QPainter(self)
+        pixmap = self._ensure_pixmap()
+        if pixmap is None:
+            painter.fillRect(rect, self.palette().window())
+        else:
+            dpr = pixmap.devicePixelRatio()
+            painter.drawPixmap(QRectF(rect), pixmap,
+                               QRectF(rect.x() * dpr, rect.y() * dpr, rect.width() * dpr, rect.height() * dpr))
+        painter.end()
+        if not self._painted:
+            self._painted = True
+            self.first_paint.emit()
+
+
+def _save(image, path):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        if image.save(tmp, 'PNG'):
+            os.replace(tmp, path)
+    except OSError:
+        pass
@@ -0,0 +1,249 @@
+"""Ingest throughput and latency benchmarks.
+
+    python -m speed.bench --json results.json
+
+Runs these benchmarks against the ingest servers:
+
+- test_client: requests through Flask's in-process test client, which
+  measures the handler and framework cost without any socket
+- loopback: a real threaded server on 127.0.0.1 driven by several
+  concurrent producers, each with its own keep-alive session
+- end_to_end: time from starting a POST until the GUI thread receives the
+  sample, through LatestSamples and DigitSignals.samples_ready as in
+  main(); samples replaced by a newer one before the GUI thread got to
+  them are counted as coalesced, not timed
+- asyncio: the speed.aio_server server on its own thread, driven by raw
+  keep-alive connections that pipeline --pipeline requests at a time
+  (requests-based clients cannot generate enough load for it)
+
+Each reports requests/s and per-request latency percentiles (ms). With
+--json the results and some machine details are written out so runs can
+be compared.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+def latency_summary(latencies_s):
+    ms = np.asarray(latencies_s) * 1000.0
+    return {
+        'count': int(ms.size),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+def bench_test_client(requests_count):
+    from speed.ingest import Ingest
+    from speed.main import create_app
+
+    client = create_app(Ingest()).test_client()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(requests_count):
+        t = time.perf_counter()
+        client.post('/api/data', json={'digits': [i % 2 + 1, i]})
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    return {'requests_per_s': round(requests_count / elapsed, 1), **latency_summary(latencies)}
+
+
+@contextlib.contextmanager
+def loopback_server(ingest):
+    from werkzeug.serving import make_server
+    from speed.main import create_app
+
+    server = make_server('127.0.0.1', 0, create_app(ingest), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/api/data"
+    finally:
+        server.shutdown()
+
+
+def bench_loopback(requests_count, producers):
+    import requests
+    from speed.ingest import Ingest
+
+    per_producer = max(requests_count // producers, 1)
+    latencies = [[] for _ in range(producers)]
+    errors = [0] * producers
+
+    def produce(n, url):
+        session = requests.Session()
+        lane = n + 1
+        for i in range(per_producer):
+            t = time.perf_counter()
+            try:
+                if session.post(url, json={'digits': [lane, i]}).status_code != 200:
+                    errors[n] += 1
+            except requests.exceptions.RequestException:
+                errors[n] += 1
+            latencies[n].append(time.perf_counter() - t)
+        session.close()
+
+    with loopback_server(Ingest()) as url:
+        threads = [threading.Thread(target=produce, args=(n, url)) for n in range(producers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    total = per_producer * producers
+    return {'producers': producers, 'requests_per_s': round(total / elapsed, 1),
+            'errors': sum(errors), **latency_summary([x for l in latencies for x in l])}
+
+
+def bench_end_to_end(requests_count, interval):
+    import requests
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from speed.ingest import Ingest, LatestSamples
+    from speed.main import DigitSignals
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    signals = DigitSignals()
+    latest = LatestSamples(signals.samples_ready.emit)
+    sent_at = {}
+    latencies = []
+
+    def show_latest():
+        # runs in the GUI (main) thread, like DigitDisplayGUI.show_latest
+        for data in latest.drain():
+            started = sent_at.get(int(data[1]))
+            if started is not None:
+                latencies.append(time.perf_counter() - started)
+            if int(data[1]) == requests_count - 1:
+                app.quit()
+
+    signals.samples_ready.connect(show_latest)
+
+    def produce(url):
+        session = requests.Session()
+        for i in range(requests_count):
+            sent_at[i] = time.perf_counter()
+            session.post(url, json={'digits': [1, i]})
+            if interval:
+                time.sleep(interval)
+        session.close()
+
+    with loopback_server(Ingest(on_digits=latest.push)) as url:
+        producer = threading.Thread(target=produce, args=(url,), daemon=True)
+        producer.start()
+        QTimer.singleShot(60000, app.quit)  # give up rather than hang
+        app.exec()
+        producer.join(5)
+    return {'received': len(latencies), 'coalesced': latest.coalesced, **latency_summary(latencies or [0.0])}
+
+
+def bench_asyncio(requests_count, connections, pipeline):
+    import asyncio
+    from speed.aio_server import AsyncIngestServer
+
+    server = AsyncIngestServer(host='127.0.0.1', port=0)
+    server_loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run_server():
+        asyncio.set_event_loop(server_loop)
+        server_loop.run_until_complete(server.start())
+        started.set()
+        server_loop.run_forever()
+        server_loop.close()
+
+    server_thread = threading.Thread(target=run_server, daemon=True)
+    server_thread.start()
+    started.wait()
+
+    per_conn = max(requests_count // connections, pipeline)
+    latencies = []
+
+    async def client(lane):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        for start in range(0, per_conn, pipeline):
+            burst = min(pipeline, per_conn - start)
+            t = time.perf_counter()
+            for i in range(start, start + burst):
+                body = b'{"digits":[%d,%d]}' % (lane, i)
+                writer.write(b'POST /api/data HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+            for _ in range(burst):
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+                await reader.readexactly(length)
+            # every request in the burst waited for the whole burst
+            latencies.extend([time.perf_counter() - t] * burst)
+        writer.close()
+        await writer.wait_closed()
+
+    async def run_clients():
+        await asyncio.gather(*(client(n % 16 + 1) for n in range(connections)))
+
+    start = time.perf_counter()
+    asyncio.run(run_clients())
+    elapsed = time.perf_counter() - start
+    asyncio.run_coroutine_threadsafe(server.close(), server_loop).result()
+    server_loop.call_soon_threadsafe(server_loop.stop)
+    server_thread.join()
+    total = per_conn * connections
+    return {'connections': connections, 'pipeline': pipeline,
+            'requests_per_s': round(total / elapsed, 1), **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingest paths")
+    parser.add_argument('--requests', type=int, default=2000, help="requests per benchmark")
+    parser.add_argument('--producers', type=int, default=4, help="concurrent loopback producers")
+    parser.add_argument('--interval', type=float, default=0.001,
+                        help="pause between end-to-end POSTs, seconds")
+    parser.add_argument('--connections', type=int, default=100, help="asyncio benchmark connections")
+    parser.add_argument('--pipeline', type=int, default=8, help="asyncio benchmark requests in flight per connection")
+    parser.add_argument('--only', choices=['test_client', 'loopback', 'end_to_end', 'asyncio'], action='append',
+                        help="run only these benchmarks (repeatable)")
+    parser.add_argument('--json', metavar='PATH', help="write results as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    benchmarks = {
+        'test_client': lambda: bench_test_client(args.requests),
+        'loopback': lambda: bench_loopback(args.requests, args.producers),
+        'end_to_end': lambda: bench_end_to_end(args.requests, args.interval),
+        'asyncio': lambda: bench_asyncio(args.requests * 10, args.connections, args.pipeline),
+    }
+    results = {}
+    for name, run in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        # the ingest handler prints every sample; keep that out of the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = run()
+        print(f"{name:12s} {json.dumps(results[name])}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'timestamp': time.time(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'args': vars(args),
+                'results': results,
+            }, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
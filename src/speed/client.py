@@ -3,12 +3,18 @@ import requests
 import json
 import time
 from random import randint
+from speed.sender import Sender
 # Send data
 url = "http://localhost:65500/api/data"
+# Buffer readings and POST them to /api/data/batch once BATCH_SIZE are
+# pending or the oldest is BATCH_MAX_AGE seconds old; 0 posts each reading
+BATCH_SIZE = 0
+BATCH_MAX_AGE = 5.0
+# readings go out from a background worker, so a slow server never delays the loop
+sender = Sender(url, coalesce=not BATCH_SIZE, batch_size=BATCH_SIZE, max_age=BATCH_MAX_AGE)
 speed = 5
 while True:
-    data = {"digits": [1, speed]}
-    response = requests.post(url, json=data)
+    sender.send(1, speed)
     speed += random.randint(10, 15)
 
     # data = {"digits": [2, speed]}
@@ -1,15 +1,21 @@
 import requests
 import json
 import time
+from speed.sender import Sender
 # Send data
 url = "http://localhost:65500/api/data"
+# Buffer readings and POST them to /api/data/batch once BATCH_SIZE are
+# pending or the oldest is BATCH_MAX_AGE seconds old; 0 posts each reading
+BATCH_SIZE = 0
+BATCH_MAX_AGE = 5.0
+# readings go out from a background worker, so a slow server never delays the loop
+sender = Sender(url, coalesce=not BATCH_SIZE, batch_size=BATCH_SIZE, max_age=BATCH_MAX_AGE)
 speed = 5
 while True:
     # data = {"digits": [1, speed]}
     # response = requests.post(url, json=data)
     # speed += 5
 
-    data = {"digits": [2, speed]}
-    response = requests.post(url, json=data)
+    sender.send(2, speed)
     speed += 5
     time.sleep(1)
\ No newline at end of file
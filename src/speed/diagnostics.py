@@ -0,0 +1,101 @@
+"""In-memory ring of recent frames for diagnosing recognition problems.
+
+The capture loop records every recognised frame (raw capture and the
+binary image OCR saw) into preallocated arrays, which costs two memory
+copies. Nothing touches the disk until dump() is called, on demand or
+when recognition fails or jumps; a background thread then writes the
+ring out as PNGs plus an index.json with times and recognised values.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    def __init__(self, capacity=32, directory='diagnostics', max_pending=4):
+        self.capacity = capacity
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._raw = None
+        self._processed = None
+        self._times = np.zeros(capacity)
+        self._values = np.full(capacity, np.nan)  # NaN: not recognised
+        self._head = 0
+        self._count = 0
+        self._last_dump = -np.inf
+        self.dumps = 0
+        self.dropped_dumps = 0
+        self._queue = queue.Queue(max_pending)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _allocate(self, raw, processed):
+        self._raw = np.empty((self.capacity,) + raw.shape, dtype=raw.dtype)
+        self._processed = np.empty((self.capacity,) + processed.shape, dtype=processed.dtype)
+        self._count = 0
+
+    def record(self, raw, processed, value, timestamp=None):
+        """Copy a frame pair into the ring, overwriting the oldest."""
+        with self._lock:
+            if (self._raw is None or self._raw.shape[1:] != raw.shape
+                    or self._processed.shape[1:] != processed.shape):
+                self._allocate(raw, processed)  # first frame, or the region changed
+            i = self._head
+            np.copyto(self._raw[i], raw)
+            np.copyto(self._processed[i], processed)
+            self._times[i] = time.time() if timestamp is None else timestamp
+            self._values[i] = np.nan if value is None else value
+            self._head = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def snapshot(self):
+        """Copies of (raw, processed, times, values), oldest first."""
+        with self._lock:
+            if self._raw is None:
+                return None
+            order = (np.arange(self._count) + self._head - self._count) % self.capacity
+            return self._raw[order], self._processed[order], self._times[order], self._values[order]
+
+    def dump(self, reason, min_interval=0.0):
+        """Queue the current ring for writing; returns the target directory.
+
+        Returns None if nothing was queued: the ring is empty, the last
+        dump was less than min_interval seconds ago, or the writer is
+        still busy with earlier dumps.
+        """
+        now = time.monotonic()
+        if now - self._last_dump < min_interval:
+            return None
+        snapshot = self.snapshot()
+        if snapshot is None or not len(snapshot[2]):
+            return None
+        target = os.path.join(self.directory, time.strftime('%Y%m%d-%H%M%S') + f"-{reason}")
+        try:
+            self._queue.put_nowait((target, reason, snapshot))
+        except queue.Full:
+            self.dropped_dumps += 1
+            return None
+        self._last_dump = now
+        return target
+
+    def _write_loop(self):
+        while True:
+            target, reason, (raw, processed, times, values) = self._queue.get()
+            try:
+                os.makedirs(target, exist_ok=True)
+                frames = []
+                for i in range(len(times)):
+                    cv2.imwrite(os.path.join(target, f"{i:03d}-raw.png"), raw[i])
+                    cv2.imwrite(os.path.join(target, f"{i:03d}-processed.png"), processed[i])
+                    frames.append({'index': i, 'time': float(times[i]),
+                                   'value': None if np.isnan(values[i]) else int(values[i])})
+                with open(os.path.join(target, 'index.json'), 'w') as f:
+                    json.dump({'reason': reason, 'frames': frames}, f, indent=2)
+                self.dumps += 1
+            except (OSError, cv2.error) as e:
+                print(f"⚠️ Diagnostics dump to {target} failed: {e}")
@@ -0,0 +1,143 @@
+from PySide6.QtCore import QPoint, QRect, Qt, QTimer
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+
+class GlyphCache:
+    """Pixmaps of single characters rendered once per font, color and DPR."""
+
+    _caches = {}
+
+    @classmethod
+    def get(cls, font, color, dpr):
+        key = (font.key(), QColor(color).rgba(), dpr)
+        cache = cls._caches.get(key)
+        if cache is None:
+            cache = cls._caches[key] = cls(font, color, dpr)
+        return cache
+
+    def __init__(self, font, color, dpr):
+        self.font = QFont(font)
+        self.color = QColor(color)
+        self.dpr = dpr
+        self.metrics = QFontMetrics(self.font)
+        self.height = self.metrics.height()
+        self._glyphs = {}
+
+    def glyph(self, ch):
+        """Return (pixmap, advance) for ch, rendering it on first use."""
+        cached = self._glyphs.get(ch)
+        if cached is None:
+            advance = self.metrics.horizontalAdvance(ch)
+            pix = QPixmap(round(max(advance, 1) * self.dpr), round(self.height * self.dpr))
+            pix.setDevicePixelRatio(self.dpr)
+            pix.fill(Qt.transparent)
+            painter = QPainter(pix)
+            painter.setRenderHint(QPainter.TextAntialiasing)
+            painter.setFont(self.font)
+            painter.setPen(self.color)
+            painter.drawText(0, self.metrics.ascent(), ch)
+            painter.end()
+            cached = self._glyphs[ch] = (pix, advance)
+        return cached
+
+
+class DigitWidget(QWidget):
+    """Drop-in replacement for the big digit QLabels.
+
+    Text is drawn from cached glyph pixmaps, left-aligned and vertically
+    centred like a QLabel. setText() only repaints the character cells
+    that changed, and flash() draws a translucent overlay for a moment
+    instead of restyling the widget.
+    """
+
+    FLASH_COLOR = QColor(255, 255, 255, 40)
+
+    def __init__(self, text, parent=None, font=None, color='#ffffff'):
+        super().__init__(parent)
+        self._font = QFont(font) if font is not None else QFont()
+        self._color = color
+        self._cache = None
+        self._text = ''
+        self._cells = []  # (x, advance) per character
+        self._flashing = False
+        self._flash_timer = QTimer(self)
+        self._flash_timer.setSingleShot(True)
+        self._flash_timer.timeout.connect(self._end_flash)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.setText(text)
+
+    def cache(self):
+        dpr = self.devicePixelRatioF()
+        if self._cache is None or self._cache.dpr != dpr:
+            self._cache = GlyphCache.get(self._font, self._color, dpr)
+        return self._cache
+
+    def setFont(self, font):
+        self._font = QFont(font)
+        self._cache = None
+        text, self._text = self._text, ''
+        self.setText(text)
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        text = str(text)
+        old = self._text
+        if text == old:
+            return
+        cache = self.cache()
+        cells = []
+        x = 0
+        for ch in text:
+            advance = cache.glyph(ch)[1]
+            cells.append((x, advance))
+            x += advance
+        # first cell that differs; everything after it may have moved
+        first = 0
+        while first < min(len(old), len(text)) and old[first] == text[first] \
+                and self._cells[first] == cells[first]:
+            first += 1
+        # cells after `first` that kept both glyph and position need no repaint
+        last_old, last_new = len(old), len(text)
+        while last_old > first and last_new > first and old[last_old - 1] == text[last_new - 1] \
+                and self._cells[last_old - 1] == cells[last_new - 1]:
+            last_old -= 1
+            last_new -= 1
+        dirty = QRect()
+        for cells_, lo, hi in ((self._cells, first, last_old), (cells, first, last_new)):
+            if hi > lo:
+                x0 = cells_[lo][0]
+                x1 = cells_[hi - 1][0] + cells_[hi - 1][1]
+                dirty = dirty.united(QRect(x0, 0, x1 - x0, self.height()))
+        self._text = text
+        self._cells = cells
+        if not dirty.isNull():
+            self.update(dirty)
+
+    def flash(self, msec=180):
+        if not self._flashing:
+            self._flashing = True
+            self.update(self._text_rect())
+        self._flash_timer.start(msec)
+
+    def _end_flash(self):
+        self._flashing = False
+        self.update(self._text_rect())
+
+    def _text_rect(self):
+        width = self._cells[-1][0] + self._cells[-1][1] if self._cells else 0
+        return QRect(0, 0, width, self.height())
+
+    def paintEvent(self, event):
+        cache = self.cache()
+        clip = event.rect()
+        top = (self.height() - cache.height) // 2
+        painter = QPainter(self)
+        if self._flashing:
+            painter.fillRect(self._text_rect().intersected(clip), self.FLASH_COLOR)
+        for ch, (x, advance) in zip(self._text, self._cells):
+            if x < clip.right() + 1 and x + advance > clip.left():
+                painter.drawPixmap(QPoint(x, top), cache.glyph(ch)[0])
+        painter.end()
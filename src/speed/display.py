@@ -0,0 +1,39 @@
+SPEED, TIMER, PATH = 0, 1, 2
+
+
+def format_time(total_seconds):
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class DisplayModel:
+    """The text on screen for every lane's speed, timer and path widgets.
+
+    render() formats what the lanes should show and set() pushes a string
+    to its widget only when it differs from the one already there, so a
+    tick that changes nothing costs no widget updates at all.
+    """
+
+    def __init__(self, widgets):
+        self.widgets = widgets  # [[speed, timer, path] per lane]
+        self.shown = [[w.text() for w in row] for row in widgets]
+        self.updates = 0
+
+    def set(self, lane, field, text):
+        if self.shown[lane][field] != text:
+            self.shown[lane][field] = text
+            self.widgets[lane][field].setText(text)
+            self.updates += 1
+
+    def render(self, lanes, elapsed):
+        """Show timer and path for every lane from Lanes state."""
+        for lane in range(lanes.count):
+            if lanes.active[lane]:
+                self.set(lane, TIMER, format_time(int(elapsed[lane])))
+                self.set(lane, PATH, f"{lanes.total_path[lane]:.2f}")
+            else:
+                # Timer was never started: show zeros
+                self.set(lane, TIMER, "00:00:00")
+                self.set(lane, PATH, "0.00")
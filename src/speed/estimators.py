@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+
+
+class RateEstimator:
+    """Base for per-lane rotation-rate estimators.
+
+    Every lane keeps the last `window` (time, rotations) samples in a
+    preallocated ring. update() records a sample and returns the current
+    rate estimate in rotations per second; each estimator keeps running
+    state so an update is O(1) however long the window is.
+    """
+
+    def __init__(self, lanes, window=8):
+        self.window = window
+        self.times = np.zeros((lanes, window))
+        self.rotations = np.zeros((lanes, window))
+        self.head = np.zeros(lanes, dtype=np.intp)   # next slot to write
+        self.count = np.zeros(lanes, dtype=np.intp)  # samples in the ring
+        self.rate = np.zeros(lanes)
+
+    def reset(self, lane):
+        self.head[lane] = 0
+        self.count[lane] = 0
+        self.rate[lane] = 0.0
+
+    def _push(self, lane, t, r):
+        # store the sample; returns the previous newest sample and whether
+        # the ring was full (its oldest sample is then overwritten)
+        head = self.head[lane]
+        prev = head - 1 if head else self.window - 1
+        prev_t, prev_r = self.times[lane, prev], self.rotations[lane, prev]
+        full = self.count[lane] == self.window
+        self.times[lane, head] = t
+        self.rotations[lane, head] = r
+        self.head[lane] = head + 1 if head + 1 < self.window else 0
+        if not full:
+            self.count[lane] += 1
+        return prev_t, prev_r, full
+
+    def oldest(self, lane):
+        # slot the next _push will overwrite when the ring is full
+        head = self.head[lane]
+        return self.times[lane, head], self.rotations[lane, head]
+
+    def update(self, lane, t, r):
+        raise NotImplementedError
+
+
+class TwoPointEstimator(RateEstimator):
+    """Rate between the last two samples (the original behaviour)."""
+
+    def update(self, lane, t, r):
+        prev_t, prev_r, _ = self._push(lane, t, r)
+        if self.count[lane] > 1 and t > prev_t:
+            self.rate[lane] = (r - prev_r) / (t - prev_t)
+        return self.rate[lane]
+
+
+class LeastSquaresEstimator(RateEstimator):
+    """Least-squares slope of rotations over time across the window.
+
+    Keeps running sums of t, r, t*t and t*r, adding the new sample and
+    subtracting the one it evicts. Sums are taken relative to a per-lane
+    origin that moves to the newest sample once per window, which keeps
+    them small enough that the subtractions do not lose precision.
+    """
+
+    def __init__(self, lanes, window=8):
+        super().__init__(lanes, window)
+        self.origin = np.zeros((lanes, 2))  # (t0, r0)
+        self.sums = np.zeros((lanes, 4))    # St, Sr, Stt, Str relative to origin
+
+    def reset(self, lane):
+        super().reset(lane)
+        self.sums[lane] = 0.0
+
+    def update(self, lane, t, r):
+        sums = self.sums[lane]
+        if self.count[lane] == 0:
+            self.origin[lane] = (t, r)
+        t0, r0 = self.origin[lane]
+        if self.count[lane] == self.window:
+            old_t, old_r = self.oldest(lane)
+            x, y = old_t - t0, old_r - r0
+            sums[0] -= x
+            sums[1] -= y
+            sums[2] -= x * x
+            sums[3] -= x * y
+        self._push(lane, t, r)
+        x, y = t - t0, r - r0
+        sums[0] += x
+        sums[1] += y
+        sums[2] += x * x
+        sums[3] += x * y
+
+        n = self.count[lane]
+        st, sr, stt, str_ = sums
+        denom = n * stt - st * st
+        if n > 1 and denom > 0:
+            self.rate[lane] = (n * str_ - st * sr) / denom
+
+        if self.head[lane] == 0:
+            # rebase the origin onto this sample: shift every x by a, every y by b
+            a, b = x, y
+            sums[3] = str_ - a * sr - b * st + n * a * b
+            sums[2] = stt - 2 * a * st + n * a * a
+            sums[0] = st - n * a
+            sums[1] = sr - n * b
+            self.origin[lane] = (t, r)
+        return self.rate[lane]
+
+
+class EwmaEstimator(RateEstimator):
+    """Exponentially weighted two-point rate with time constant tau seconds.
+
+    The weight of each new sample depends on the time since the previous
+    one, so irregular sample spacing is handled correctly.
+    """
+
+    def __init__(self, lanes, window=8, tau=2.0):
+        super().__init__(lanes, window)
+        self.tau = tau
+
+    def update(self, lane, t, r):
+        prev_t, prev_r, _ = self._push(lane, t, r)
+        n = self.count[lane]
+        if n > 1 and t > prev_t:
+            dt = t - prev_t
+            instant = (r - prev_r) / dt
+            if n == 2:
+                self.rate[lane] = instant
+            else:
+                self.rate[lane] += (1.0 - math.exp(-dt / self.tau)) * (instant - self.rate[lane])
+        return self.rate[lane]
+
+
+ESTIMATORS = {
+    'two-point': TwoPointEstimator,
+    'lsq': LeastSquaresEstimator,
+    'ewma': EwmaEstimator,
+}
+
+
+def make_estimator(name, lanes, **kwargs):
+    try:
+        cls = ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(f"unknown estimator {name!r}, expected one of {', '.join(sorted(ESTIMATORS))}")
+    return cls(lanes, **kwargs)
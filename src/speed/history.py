@@ -0,0 +1,256 @@
+"""Per-lane speed and distance history, rolled up as samples arrive.
+
+    GET /api/history?lane=1&from=<epoch s>&to=<epoch s>&step=<s>
+
+Every sample updates one open bucket per tier (1 s, 10 s and 1 min by
+default) with the count, min, max, sum and last of the lane's speed and
+distance. When a sample lands in a new bucket the open one is written
+into the tier's fixed-size ring, so each tier keeps a bounded window
+(6 h, 1 day and 1 week) in constant memory. A query reads bucket rows
+from the best-fitting tier and merges neighbouring buckets when the
+requested step is coarser; raw samples are never stored or scanned.
+
+Speed and distance are computed here as in the GUI: the lane's rate
+estimator gives rotations per second, and distance is the rotations
+counted since the lane's first sample (a counter restart adds nothing).
+Times are sample times: the producer's timestamp when it sent one,
+else the server arrival time.
+"""
+import math
+import threading
+
+import numpy as np
+
+from speed.estimators import make_estimator
+
+# (bucket seconds, buckets kept): 6 h of 1 s, 1 day of 10 s, 1 week of 1 min
+TIERS = ((1, 6 * 3600), (10, 24 * 360), (60, 7 * 24 * 60))
+# without an explicit step, points returned for a query at most
+MAX_POINTS = 2000
+DEFAULT_SPAN = 3600.0  # seconds before `to` when `from` is not given
+
+# columns of a bucket row
+COUNT, SPEED_MIN, SPEED_MAX, SPEED_SUM, SPEED_LAST, DIST_MIN, DIST_MAX, DIST_SUM, DIST_LAST = range(9)
+# bucket number of a slot that has never been written; times before 1970 give negative numbers
+EMPTY = np.iinfo(np.int64).min
+
+
+class Tier:
+    """Buckets of one resolution: the open one plus a ring of closed ones."""
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.ids = np.full(capacity, EMPTY, dtype=np.int64)  # bucket number held by each slot
+        self.rows = np.zeros((capacity, 9))
+        self.open_id = None
+        self.open = None  # row of the bucket being filled, as a list
+
+    def add(self, t, speed, distance):
+        bucket = int(t // self.step)
+        row = self.open
+        if bucket != self.open_id:
+            if row is not None:
+                slot = self.open_id % self.capacity
+                self.ids[slot] = self.open_id
+                self.rows[slot] = row
+            self.open_id = bucket
+            self.open = [1, speed, speed, speed, speed, distance, distance, distance, distance]
+            return
+        row[COUNT] += 1
+        if speed < row[SPEED_MIN]:
+            row[SPEED_MIN] = speed
+        elif speed > row[SPEED_MAX]:
+            row[SPEED_MAX] = speed
+        row[SPEED_SUM] += speed
+        row[SPEED_LAST] = speed
+        if distance < row[DIST_MIN]:
+            row[DIST_MIN] = distance
+        elif distance > row[DIST_MAX]:
+            row[DIST_MAX] = distance
+        row[DIST_SUM] += distance
+        row[DIST_LAST] = distance
+
+    def oldest(self):
+        """Start time of the oldest bucket the ring can still hold."""
+        return (self.open_id - self.capacity + 1) * self.step
+
+    def window(self, first, last):
+        """(bucket numbers, rows) of the non-empty buckets in [first, last], in order."""
+        if self.open_id is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, 9))
+        last = min(last, self.open_id)
+        first = max(first, last - self.capacity + 1)
+        wanted = np.arange(first, last + 1, dtype=np.int64)
+        slots = wanted % self.capacity
+        keep = self.ids[slots] == wanted  # slots of empty or overwritten buckets hold other numbers
+        ids, rows = wanted[keep], self.rows[slots[keep]]
+        if first <= self.open_id == last:
+            ids = np.append(ids, self.open_id)
+            rows = np.vstack([rows, self.open])
+        return ids, rows
+
+
+class LaneHistory:
+    def __init__(self, tiers, estimator, km_per_rotation):
+        self.tiers = [Tier(step, capacity) for step, capacity in tiers]
+        self.estimator = make_estimator(estimator, 1)
+        self.km_per_rotation = km_per_rotation
+        self.prev_time = None
+        self.prev_rotations = None
+        self.distance = 0.0
+
+    def add(self, t, rotations):
+        if self.prev_time is None:
+            self.estimator.reset(0)
+            self.estimator.update(0, t, rotations)
+            speed = 0.0
+        elif t <= self.prev_time:
+            return  # repeated or out-of-order sample
+        else:
+            diff = rotations - self.prev_rotations
+            if diff < 0:
+                # sensor counter restarted
+                self.estimator.reset(0)
+                diff = 0
+            self.distance += diff * self.km_per_rotation
+            rate = self.estimator.update(0, t, rotations)
+            speed = float(max(rate, 0.0)) * self.km_per_rotation * 3600.0  # km/h
+        self.prev_time = t
+        self.prev_rotations = rotations
+        for tier in self.tiers:
+            tier.add(t, speed, self.distance)
+
+
+class History:
+    """Multi-resolution rollups for every lane; see the module docstring.
+
+    record() has the Ingest listener signature and is O(1) per sample.
+    Only lanes 1..lanes are kept, like the GUI shows them: each lane's
+    rings take a few MB, so arbitrary column numbers must not add lanes.
+    """
+
+    def __init__(self, tiers=TIERS, estimator='two-point', circle_length=20, lanes=2):
+        self.tiers = tuple(sorted(tiers))
+        self.lane_ids = frozenset(range(1, lanes + 1))
+        self.estimator = estimator
+        self.km_per_rotation = circle_length / 100000.0  # circle_length in cm
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def record(self, lane, rotations, server_ts, sensor_ts=None):
+        if lane not in self.lane_ids:
+            return
+        t = server_ts if sensor_ts is None else float(sensor_ts)
+        with self._lock:
+            history = self._lanes.get(lane)
+            if history is None:
+                history = self._lanes[lane] = LaneHistory(self.tiers, self.estimator, self.km_per_rotation)
+            history.add(t, float(rotations))
+
+    def lanes(self):
+        with self._lock:
+            return sorted(self._lanes)
+
+    def query(self, lane, start=None, end=None, step=None):
+        """Rollups of lane between start and end (epoch seconds) as a JSON-ready dict.
+
+        Without step, the finest tier that covers start and gives at most
+        MAX_POINTS buckets is used, merging buckets if even the coarsest
+        gives more. With step, buckets of the coarsest tier not coarser than
+        step are merged into step-second points (step is rounded to a
+        multiple of the tier's).
+        """
+        with self._lock:
+            history = self._lanes.get(lane)
+            if end is None:
+                end = history.prev_time if history is not None else 0.0
+            if start is None:
+                start = end - DEFAULT_SPAN
+            if start > end:
+                raise ValueError("from must not be after to")
+            if history is None:
+                return _result(lane, start, end, step or self.tiers[0][0], self.tiers[0][0],
+                               np.empty(0), np.empty((0, 9)))
+            tier, k = self._pick(history.tiers, start, end, step)
+            # merged points cover whole steps, so start at a step boundary
+            ids, rows = tier.window(int(start // tier.step) // k * k, int(end // tier.step))
+        if k > 1:
+            ids, rows = _merge(ids, rows, k)
+        return _result(lane, start, end, k * tier.step, tier.step, ids * (k * tier.step), rows)
+
+    @staticmethod
+    def _pick(tiers, start, end, step):
+        # tiers whose ring still reaches back to start; the coarsest as a fallback
+        covering = [tier for tier in tiers if tier.oldest() <= start] or tiers[-1:]
+        span = end - start
+        if step is None:
+            for tier in covering:
+                if span / tier.step <= MAX_POINTS:
+                    return tier, 1
+            tier = covering[-1]
+            return tier, math.ceil(span / tier.step / MAX_POINTS)
+        fitting = [tier for tier in covering if tier.step <= step] or covering[:1]
+        tier = fitting[-1]
+        return tier, max(1, round(step / tier.step))
+
+
+def _merge(ids, rows, k):
+    # combine buckets into groups of k aligned to multiples of the new step
+    if not len(ids):
+        return ids, rows
+    groups = ids // k
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], len(ids)] - 1
+    merged = np.empty((len(starts), 9))
+    for col in (COUNT, SPEED_SUM, DIST_SUM):
+        merged[:, col] = np.add.reduceat(rows[:, col], starts)
+    for col in (SPEED_MIN, DIST_MIN):
+        merged[:, col] = np.minimum.reduceat(rows[:, col], starts)
+    for col in (SPEED_MAX, DIST_MAX):
+        merged[:, col] = np.maximum.reduceat(rows[:, col], starts)
+    for col in (SPEED_LAST, DIST_LAST):
+        merged[:, col] = rows[ends, col]
+    return groups[starts], merged
+
+
+def _result(lane, start, end, step, tier, times, rows):
+    counts = rows[:, COUNT]
+    return {
+        'lane': lane, 'from': start, 'to': end, 'step': step, 'tier': tier,
+        't': times.tolist(),
+        'count': counts.astype(int).tolist(),
+        'speed': {
+            'min': rows[:, SPEED_MIN].round(2).tolist(),
+            'max': rows[:, SPEED_MAX].round(2).tolist(),
+            'mean': (rows[:, SPEED_SUM] / np.maximum(counts, 1)).round(2).tolist(),
+            'last': rows[:, SPEED_LAST].round(2).tolist(),
+        },
+        'distance': {
+            'min': rows[:, DIST_MIN].round(4).tolist(),
+            'max': rows[:, DIST_MAX].round(4).tolist(),
+            'mean': (rows[:, DIST_SUM] / np.maximum(counts, 1)).round(4).tolist(),
+            'last': rows[:, DIST_LAST].round(4).tolist(),
+        },
+    }
+
+
+def parse_history_query(query):
+    """Extract (lane, from, to, step) from GET /api/history query arguments (a mapping)."""
+    try:
+        lane = int(query['lane'])
+    except (KeyError, ValueError):
+        raise ValueError("lane is required and must be an integer")
+    values = []
+    for name in ('from', 'to', 'step'):
+        value = query.get(name)
+        try:
+            value = float(value) if value not in (None, '') else None
+        except ValueError:
+            value = math.nan
+        if value is not None and not math.isfinite(value):
+            raise ValueError(f"{name} must be a number")
+        values.append(value)
+    if values[2] is not None and not values[2] > 0:
+        raise ValueError("step must be positive")
+    return (lane, *values)
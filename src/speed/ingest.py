@@ -0,0 +1,227 @@
+import math
+import threading
+import time
+import weakref
+
+from speed.history import History
+from speed.metrics import REGISTRY
+from speed.reorder import ReorderBuffer
+from speed.store import SnapshotStore
+from speed.stream import Broadcaster
+
+
+SAMPLES = REGISTRY.counter('speed_ingest_samples_total', "Samples applied to the store, per lane", ['lane'])
+# shared by the Flask and asyncio servers
+HANDLER_SECONDS = REGISTRY.histogram('speed_http_handler_seconds', "Ingest server handler time", ['handler'])
+_instances = weakref.WeakSet()
+
+
+def _collect():
+    # counters that Ingest's parts already keep, summed over live instances
+    reorder = {}
+    dropped = 0
+    for ingest in list(_instances):
+        for lane, stats in ingest.reorder_stats().items():
+            totals = reorder.setdefault(lane, dict.fromkeys(stats, 0))
+            for name, value in stats.items():
+                totals[name] += value
+        dropped += ingest.broadcaster.dropped
+    for name, help in (('duplicates', "Sequenced samples dropped as duplicates"),
+                       ('late', "Sequenced samples dropped as too late"),
+                       ('lost', "Sequence numbers skipped as lost")):
+        yield (f'speed_reorder_{name}_total', 'counter', help,
+               [({'lane': lane}, totals[name]) for lane, totals in sorted(reorder.items())])
+    yield ('speed_stream_dropped_total', 'counter', "Samples dropped for slow /api/stream subscribers",
+           [({}, dropped)])
+
+
+REGISTRY.add_collector(_collect)
+
+
+# session logs (speed.recorder) store the lane as uint32; column 1 is the first lane
+MAX_LANE = 2 ** 32 - 1
+
+
+def _is_number(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _is_lane(x):
+    return _is_number(x) and math.isfinite(x) and x == int(x) and 1 <= x <= MAX_LANE
+
+
+def parse_reading(data):
+    """Validate a /api/data POST body.
+
+    {"digits": [column, rotations], "ts": sensor_time, "seq": n}, ts and
+    seq optional, column a whole number in 1..MAX_LANE. Returns the
+    accept() arguments or None if invalid.
+    """
+    digits = data.get('digits', [])
+    sensor_ts = data.get('ts')
+    seq = data.get('seq')
+    if (isinstance(digits, list) and len(digits) == 2 and _is_lane(digits[0]) and _is_number(digits[1])
+            and (sensor_ts is None or _is_number(sensor_ts))
+            and (seq is None or isinstance(seq, int))):
+        return digits[0], digits[1], sensor_ts, seq
+    return None
+
+
+def parse_batch(data):
+    """Validate a /api/data/batch body as a whole.
+
+    {"samples": [[column, rotations, sensor_timestamp, seq], ...]},
+    timestamp and seq optional. Returns (samples, None), or (None, error)
+    with the JSON error body to send back.
+    """
+    samples = data.get('samples')
+    if not isinstance(samples, list):
+        return None, {'error': 'Invalid data format'}
+    for i, sample in enumerate(samples):
+        if not (isinstance(sample, list) and 2 <= len(sample) <= 4
+                and _is_lane(sample[0]) and all(_is_number(x) for x in sample[1:3])
+                and (len(sample) < 4 or isinstance(sample[3], int))):
+            return None, {'error': 'Invalid data format', 'index': i}
+    return samples, None
+
+
+class LatestSamples:
+    """Hands a consumer that may fall behind only the newest sample per lane.
+
+    push() fits Ingest's on_digits. notify (e.g. a Qt signal's emit,
+    which queues a call into the GUI thread) is called only for the first
+    sample after a drain(), so however fast samples arrive the consumer
+    has at most one wake-up queued and one sample per lane waiting.
+    Distance still adds up, since samples carry the rotation count.
+    """
+
+    def __init__(self, notify):
+        self.notify = notify
+        self.coalesced = 0  # samples replaced by a newer one before delivery
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def push(self, data):
+        with self._lock:
+            idle = not self._pending
+            if data[0] in self._pending:
+                self.coalesced += 1
+            self._pending[data[0]] = data
+        if idle:
+            self.notify()
+
+    def drain(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        return pending
+
+
+class Ingest:
+    """Latest-value store shared by every ingest transport.
+
+    The Flask endpoints and the UDP listener all go through accept(), so
+    /api/data, /api/stream and the GUI see the same samples whichever way
+    they arrived.
+
+    Samples that carry a producer sequence number pass through a per-lane
+    ReorderBuffer first, which drops duplicates and late arrivals and
+    releases the rest in order.
+
+    on_digits is called with [column, rotations, sample_time] for every
+    accepted sample, from the transport's thread. sample_time is the
+    producer's timestamp when it sent one, else the server arrival time.
+    Passing a Qt signal's emit makes the delivery a queued cross-thread
+    call into the GUI thread.
+
+    Listeners added with add_listener() are called for every accepted
+    sample as fn(lane, rotations, server_ts, sensor_ts), with sensor_ts
+    None when the producer sent no timestamp. They run under the store
+    lock on the ingest path, so they must only queue work, never block.
+
+    history (a History, by default with the default estimator and two
+    lanes) is such a listener; it keeps the rollups /api/history answers
+    from.
+    """
+
+    def __init__(self, on_digits=None, history=None):
+        self.on_digits = on_digits
+        self.listeners = []
+        self.history = history if history is not None else History()
+        self.add_listener(self.history.record)
+        # latest per column ('1' and '2'), versioned for conditional GETs
+        self.store = SnapshotStore()
+        # live feed of every accepted sample for /api/stream subscribers
+        self.broadcaster = Broadcaster()
+        self._reorder = {}
+        self._expiry = {}
+        self._samples = {}  # lane -> SAMPLES child
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def accept(self, column, rotations, sensor_ts=None, seq=None):
+        # normalize column key as string '1' or '2'
+        col_key = str(int(column))
+        with self._lock:
+            if seq is None:
+                self._apply(col_key, column, rotations, sensor_ts)
+                return col_key
+            buf = self._reorder.get(col_key)
+            if buf is None:
+                buf = self._reorder[col_key] = ReorderBuffer()
+            for column, rotations, sensor_ts in buf.push(int(seq), (column, rotations, sensor_ts)):
+                self._apply(col_key, column, rotations, sensor_ts)
+            self._arm_expiry(col_key, buf)
+        return col_key
+
+    def _arm_expiry(self, col_key, buf):
+        # release held samples even if the producer goes quiet after a gap
+        if buf.waiting and col_key not in self._expiry:
+            timer = self._expiry[col_key] = threading.Timer(buf.max_delay, self._expire, (col_key,))
+            timer.daemon = True
+            timer.start()
+
+    def _expire(self, col_key):
+        with self._lock:
+            del self._expiry[col_key]
+            buf = self._reorder[col_key]
+            for column, rotations, sensor_ts in buf.expire():
+                self._apply(col_key, column, rotations, sensor_ts)
+            self._arm_expiry(col_key, buf)
+
+    def _apply(self, col_key, column, rotations, sensor_ts):
+        entry = {
+            'digits': [int(column), float(rotations)],
+            'timestamp': time.time()
+        }
+        sample_time = entry['timestamp']
+        if sensor_ts is not None:
+            sample_time = entry['sensor_timestamp'] = float(sensor_ts)
+        self.store.put(col_key, entry)
+        counter = self._samples.get(col_key)
+        if counter is None:
+            counter = self._samples[col_key] = SAMPLES.labels(col_key)
+        counter.inc()
+        for listener in self.listeners:
+            listener(entry['digits'][0], entry['digits'][1], entry['timestamp'], sensor_ts)
+        if self.on_digits is not None:
+            self.on_digits(entry['digits'] + [sample_time])
+        sample = {
+            'lane': entry['digits'][0],
+            'value': entry['digits'][1],
+            'timestamp': entry['timestamp']
+        }
+        if sensor_ts is not None:
+            sample['sensor_timestamp'] = sample_time
+        self.broadcaster.publish(sample)
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def snapshot(self):
+        return self.store.snapshot()
+
+    def reorder_stats(self):
+        """Per-lane duplicate/late/lost counters for sequenced producers."""
+        with self._lock:
+            return {col_key: buf.stats() for col_key, buf in self._reorder.items()}
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class Lanes:
+    """Per-lane display state stored as one NumPy array per field.
+
+    Lane i (0-based) is column str(i + 1) on the wire. Times are seconds
+    from time.time(); NaN marks "not set" for start_time, zero_since and
+    last_seen. prev_time is on the sample clock, which is the sensor's own
+    clock when the producer sends timestamps.
+    """
+
+    __slots__ = ('count', 'active', 'paused', 'elapsed_acc', 'start_time', 'zero_since',
+                 'prev_rotations', 'prev_time', 'last_seen', 'total_path', 'speed')
+
+    def __init__(self, count, now=0.0):
+        self.count = count
+        self.active = np.zeros(count, dtype=bool)        # timer was ever started
+        self.paused = np.zeros(count, dtype=bool)
+        self.elapsed_acc = np.zeros(count)                # seconds banked before the last pause
+        self.start_time = np.full(count, np.nan)          # start of the running interval
+        self.zero_since = np.full(count, np.nan)          # when speed last dropped to zero
+        self.prev_rotations = np.zeros(count)
+        self.prev_time = np.full(count, float(now))
+        self.last_seen = np.full(count, np.nan)           # arrival of the newest sample
+        self.total_path = np.zeros(count)                 # km
+        self.speed = np.zeros(count)                      # km/h
+
+    def start(self, lane, now):
+        """Start the lane's timer, or resume it if paused."""
+        self.zero_since[lane] = np.nan
+        if not self.active[lane]:
+            self.active[lane] = True
+            self.elapsed_acc[lane] = 0.0
+            self.start_time[lane] = now
+            self.paused[lane] = False
+        elif self.paused[lane]:
+            self.start_time[lane] = now
+            self.paused[lane] = False
+
+    def expire(self, now, after):
+        """Zero the speed of lanes with no new sample for after seconds.
+
+        Producers may stop sending when the wheel stops, so silence has to
+        read as standing still. Returns the indices of lanes just zeroed.
+        """
+        stale = np.flatnonzero((now - self.last_seen > after) & (self.speed != 0))
+        self.speed[stale] = 0.0
+        return stale
+
+    def advance(self, now, pause_after=2.0):
+        """Apply auto-pause/resume to every lane at once.
+
+        A lane whose speed has been zero for more than pause_after seconds
+        is paused (its running interval is banked into elapsed_acc); a
+        paused lane with non-zero speed resumes. Returns whole elapsed
+        seconds per lane as an int64 array.
+        """
+        zero = self.speed == 0
+        # start the zero-speed clock where it is not running, clear it elsewhere
+        self.zero_since = np.where(zero, np.where(np.isnan(self.zero_since), now, self.zero_since), np.nan)
+
+        running = ~np.isnan(self.start_time)
+        pause = self.active & zero & ~self.paused & (now - self.zero_since > pause_after)
+        bank = pause & running
+        self.elapsed_acc[bank] += now - self.start_time[bank]
+        self.start_time[pause] = np.nan
+        self.paused[pause] = True
+
+        resume = self.active & ~zero & self.paused
+        self.start_time[resume] = now
+        self.paused[resume] = False
+
+        running = ~np.isnan(self.start_time) & ~self.paused
+        elapsed = self.elapsed_acc + np.where(running, now - np.nan_to_num(self.start_time), 0.0)
+        return elapsed.astype(np.int64)
+
+    def next_change(self, now, expire_after, pause_after=2.0):
+        """Seconds until expire() or advance() would change what is shown.
+
+        That is the nearest of: a running timer reaching its next whole
+        second, a moving lane going silent for expire_after, and a stopped
+        lane reaching pause_after. Returns None when every lane is idle.
+        """
+        running = self.active & ~self.paused & ~np.isnan(self.start_time)
+        elapsed = self.elapsed_acc[running] + (now - self.start_time[running])
+        moving = (self.speed != 0) & ~np.isnan(self.last_seen)
+        stopping = self.active & ~self.paused & (self.speed == 0)
+        # a stopped lane whose zero-speed clock advance() has not started yet
+        # needs a tick right away
+        waits = np.concatenate((
+            1.0 - np.mod(elapsed, 1.0),
+            self.last_seen[moving] + expire_after - now,
+            np.nan_to_num(self.zero_since[stopping] + pause_after - now, nan=0.0),
+        ))
+        if not waits.size:
+            return None
+        return max(float(waits.min()), 0.0)
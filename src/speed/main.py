@@ -1,294 +1,270 @@
+import time
+# before any heavy import, so the startup timeline covers them
+STARTED = time.perf_counter()
 import sys
-import requests
+import argparse
 import threading
-import json, time
+import math
+import json
+import os
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLabel, QPushButton, QTextEdit, 
                                QGroupBox, QFrame, QSizePolicy)
 from PySide6.QtCore import QTimer, Qt, Signal, QObject
 from PySide6.QtGui import QFont, QPalette, QColor, QPixmap, QBrush
+from speed.ingest import HANDLER_SECONDS, Ingest, LatestSamples, parse_batch, parse_reading
+from speed.store import parse_query
+from speed.history import History, parse_history_query
+from speed.background import BackgroundWidget, background_asset
+from speed.digits import DigitWidget
+from speed.display import PATH, SPEED, DisplayModel
+from speed.estimators import ESTIMATORS, make_estimator
+from speed.lanes import Lanes
+from speed.metrics import CONTENT_TYPE, REGISTRY, timed
+from speed.startup import Timeline
+from speed import tracing
+from speed.tracing import ProfileWindow, traced
+
+DISPLAY_SECONDS = REGISTRY.histogram('speed_display_seconds', "GUI thread time per display update", ['function'])
+POLL_SECONDS = REGISTRY.histogram('speed_poll_seconds', "Round trip of a display poll of /api/data")
 
 # Signal class for thread-safe GUI updates
 class DigitSignals(QObject):
     digits_received = Signal(list)
+    samples_ready = Signal()  # DigitDisplayGUI.latest has samples to show
     status_update = Signal(str)
 
+# Label positions for the two-lane layout drawn on bg.png: speed, timer, path
+TWO_LANE_POSITIONS = [
+    [(620, 705), (170, 125), (100, 705)],    # left column
+    [(1075, 705), (1050, 125), (1475, 705)],  # right column
+]
+
+def lane_layout(count, width=1920, height=1080):
+    """Return (font size, [[speed, timer, path] (x, y) per lane]) for count lanes.
+
+    Two lanes keep the positions matching the background artwork; any
+    other count is laid out as a grid of up to four lanes per row.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    if count == 2:
+        return 150, TWO_LANE_POSITIONS
+    per_row = min(count, 4)
+    rows = -(-count // per_row)
+    cell_w, cell_h = width // per_row, height // rows
+    font_size = max(int(150 * min(cell_w / 960, cell_h / 1080)), 12)
+    line_h = cell_h // 3
+    positions = []
+    for lane in range(count):
+        x = (lane % per_row) * cell_w + cell_w // 10
+        y = (lane // per_row) * cell_h
+        # timer on top, then speed, then path
+        positions.append([(x, y + line_h), (x, y), (x, y + 2 * line_h)])
+    return font_size, positions
+
 class DigitDisplayGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, poll=True, lanes=2, estimator='two-point'):
         super().__init__()
         self.signals = DigitSignals()
-        self.current_digits_left = [0, 0, 0]
-        self.current_digits_right = [0, 0, 0]
-        self.paused = {'1': False, '2': False}
-        self.elapsed_acc = {'1': 0.0, '2': 0.0}
-        self.prev_rotations = {'1': 0, '2': 0}  # Track for both columns
-        self.total_path = {'1': 0, '2': 0}  # Track total path for each column
-        self.prev_time = {'1': time.time(), '2': time.time()}
+        # in-process ingest hands samples over through here (see main())
+        self.latest = LatestSamples(self.signals.samples_ready.emit)
+        # all per-lane timer/speed/path state, one array per field
+        self.lanes = Lanes(lanes, now=time.time())
+        # turns (time, rotations) samples into a rotation rate, see speed.estimators
+        self.estimator = make_estimator(estimator, lanes)
         self.CIRCLE_LENGTH = 20  # cm
-        self.zero_since = {'1': None, '2': None}
-        self.current_speed = {'1': 0, '2': 0}
+        self.SPEED_TIMEOUT = 3.0  # s without a new sample before a lane reads as stopped
         self.server_url = "http://localhost:65500/api/data"
-        self.start_times = {'1': None, '2': None}  # Track start times for each column
-        self.active_timers = {'1': False, '2': False}  # Track if timers are running
+        self.data_etag = None
+        # one-shot tick, re-armed for the next moment the display changes
         self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.update_timers)
-        self.timer.start(100)  # Update every 100ms
+        self._tick_due = None
         self.init_ui()
+        self.display = DisplayModel(self.lane_labels)
+        self.update_timers()
         self.setup_signals()
-        self.start_data_polling()
+        # When the ingest server runs in this process it pushes readings
+        # straight into self.signals, so polling it over HTTP is redundant
+        if poll:
+            self.start_data_polling()
 
     def init_ui(self):
         self.setWindowTitle("Digit Display")
         self.setGeometry(0, 0, 1920, 1080)
 
-        # Central widget with background image
-        central_widget = QWidget()
+        # Central widget paints the pre-scaled background image itself
+        bg_path = background_asset()
+        central_widget = BackgroundWidget(bg_path)
         central_widget.setObjectName("central")
         self.setCentralWidget(central_widget)
-
-        bg_path = "bg.png"
-        # Prefer using QPixmap + palette to set a background image (more reliable than stylesheet here)
-        pix = QPixmap(bg_path)
-        if not pix.isNull():
-            # Create a proper scaled background that fills the screen exactly once
-            pix = pix.scaled(self.width(), self.height(), 
-                                Qt.AspectRatioMode.IgnoreAspectRatio,  
-                                Qt.TransformationMode.SmoothTransformation)
-            
-            # Set background as a stylesheet instead of palette
-            central_widget.setStyleSheet(f"""
-                QWidget#central {{
-                    background-image: url({bg_path});
-                    background-position: center;
-                    background-repeat: no-repeat;
-                    background-size: cover;
-                }}
-            """)
+        if central_widget.loaded():
             print(f"✅ Background image '{bg_path}' loaded successfully.")
         else:
             print(f"⚠️ Warning: Background image '{bg_path}' not found or failed to load.")
 
-
-        # Style for labels
-        label_style = """
-            QLabel {
-                color: #ffffff;
-                font-weight: bold;
-            }
-        """
-
-        # Create labels with absolute positioning
-        self.left_labels = []
-        self.right_labels = []
-        
-        # Coordinates for left column (x, y positions)
-        left_positions = [
-            (620, 705),  # First digit (speed)
-            (170, 125),  # Second digit (timer)
-            (100, 705)   # Third digit (path)
-        ]
-        
-        # Coordinates for right column
-        right_positions = [
-            (1075, 705),  # First digit (speed)
-            (1050, 125),  # Second digit (timer)
-            (1475, 705)   # Third digit (path)
-        ]
-
-        # Create and position left labels
-        for _, pos in enumerate(left_positions):
-            lbl = QLabel("0", central_widget)
-            lbl.setFont(QFont("Montserrat", 150))
-            lbl.setStyleSheet(label_style)
-            lbl.setGeometry(pos[0], pos[1], 700, 125)  # x, y, width, height
-            self.left_labels.append(lbl)
-
-        # Create and position right labels
-        for _, pos in enumerate(right_positions):
-            lbl = QLabel("0", central_widget)
-            lbl.setFont(QFont("Montserrat", 150))
-            lbl.setStyleSheet(label_style)
-            lbl.setGeometry(pos[0], pos[1], 700, 125)  # x, y, width, height
-            self.right_labels.append(lbl)
+        # Create digit widgets with absolute positioning: per lane speed, timer, path
+        self.lane_labels = []
+        font_size, positions = lane_layout(self.lanes.count)
+        font = QFont("Montserrat", font_size)
+        font.setBold(True)
+        for lane_positions in positions:
+            labels = []
+            for x, y in lane_positions:
+                lbl = DigitWidget("0", central_widget, font=font, color="#ffffff")
+                lbl.setGeometry(x, y, font_size * 14 // 3, font_size * 5 // 6)  # x, y, width, height
+                labels.append(lbl)
+            self.lane_labels.append(labels)
 
         self.show()
 
     def setup_signals(self):
         self.signals.digits_received.connect(self.update_digits_display)
+        self.signals.samples_ready.connect(self.show_latest)
         self.signals.status_update.connect(lambda s: None)
 
-    def calculate_speed(self, column, current_rotations):
-        current_time = time.time()
-        prev_rot = self.prev_rotations[column]
-        prev_time = self.prev_time[column]
+    @traced()
+    def calculate_speed(self, lane, current_rotations, sample_time=None):
+        """Speed in km/h from the lane's rate estimator.
+
+        sample_time is the producer's timestamp when it sent one, so the
+        speed does not depend on how late the sample reached the GUI.
+        Returns None for a sample that is not newer than the previous one.
+        """
+        lanes = self.lanes
+        current_time = time.time() if sample_time is None else sample_time
+        prev_rot = lanes.prev_rotations[lane]
+        prev_time = lanes.prev_time[lane]
         
         if prev_rot == 0:  # First measurement
+            self.estimator.reset(lane)
+            self.estimator.update(lane, current_time, current_rotations)
             speed = 0
             path_increment_km = 0.00
+        elif current_time <= prev_time:
+            # repeated (e.g. re-polled) or out-of-order sample
+            return None
         else:
             # Calculate rotations difference
             rotations_diff = current_rotations - prev_rot
+            if rotations_diff < 0:
+                # sensor counter restarted: start a fresh estimation window
+                self.estimator.reset(lane)
+                rotations_diff = 0
             # Calculate path increment in kilometers
             # CIRCLE_LENGTH is in cm -> 100000 cm in 1 km
             path_increment_km = (rotations_diff * self.CIRCLE_LENGTH) / 100000.0
-            # Calculate time difference in seconds
-            time_diff = current_time - prev_time
-            # Calculate speed in km/h
-            speed = (path_increment_km / time_diff) * 3600.0 if time_diff > 0 else 0.00
+            # rotations/s -> km/h
+            rate = self.estimator.update(lane, current_time, current_rotations)
+            speed = max(rate, 0.0) * self.CIRCLE_LENGTH / 100000.0 * 3600.0
         
         # Update total path in km only if timer is active and not paused
-        if self.active_timers[column] and not self.paused[column]:
-            self.total_path[column] = round(self.total_path[column] + path_increment_km, 3)
-            self.total_path[column] = round(self.total_path[column], 3)  # Keep as float with 3 decimal places
+        if lanes.active[lane] and not lanes.paused[lane]:
+            lanes.total_path[lane] = round(lanes.total_path[lane] + path_increment_km, 3)  # Keep 3 decimal places
         
         # Update previous values
-        self.prev_rotations[column] = current_rotations
-        self.prev_time[column] = current_time
-        return round(speed, 1)
+        lanes.prev_rotations[lane] = current_rotations
+        lanes.prev_time[lane] = current_time
+        return round(float(speed), 1)
     
+    @timed(DISPLAY_SECONDS.labels('update_timers'))
+    @traced()
     def update_timers(self):
-        current_time = time.time()
-        
-        for column in ['1', '2']:
-            # Only update display if timer was ever started for this column
-            if self.active_timers[column]:
-                # Determine elapsed without advancing when paused
-                if self.paused[column]:
-                    elapsed = int(self.elapsed_acc[column])
-                else:
-                    # running: accumulated + current interval
-                    if self.start_times[column] is not None:
-                        elapsed = int(self.elapsed_acc[column] + (current_time - self.start_times[column]))
-                    else:
-                        elapsed = int(self.elapsed_acc[column])
-
-                # Use last calculated speed for this column
-                speed = self.current_speed[column]
-
-                # If speed is zero, start/keep a zero-timer; pause only after >2s
-                if speed == 0:
-                    if self.zero_since[column] is None:
-                        self.zero_since[column] = current_time
-                    if (current_time - self.zero_since[column]) > 2.0:
-                        # pause the timer (lock it), preserve elapsed_acc
-                        if not self.paused[column]:
-                            # accumulate current running interval before pausing
-                            if self.start_times[column] is not None:
-                                self.elapsed_acc[column] += (current_time - self.start_times[column])
-                                self.start_times[column] = None
-                            self.paused[column] = True
-                        # elapsed remains the accumulated value
-                        elapsed = int(self.elapsed_acc[column])
-                else:
-                    # speed > 0: clear zero timer and resume if paused
-                    self.zero_since[column] = None
-                    if self.paused[column]:
-                        # resume: mark new start time, do not reset elapsed_acc
-                        self.start_times[column] = current_time
-                        self.paused[column] = False
-
-                # Format time as HH:MM:SS
-                time_str = self.format_time(elapsed)
-                
-                # Update the second digit (timer) and third digit (path)
-                labels = self.left_labels if column == '1' else self.right_labels
-                if len(labels) > 1:
-                    labels[1].setText(time_str)
-                    labels[2].setText(f"{self.total_path[column]:.2f}")
-            else:
-                # Timer was never started: show zeros
-                labels = self.left_labels if column == '1' else self.right_labels
-                if len(labels) > 1:
-                    labels[1].setText("00:00:00")
-                    labels[2].setText("0.00")
-
-
-    def format_time(self, total_seconds):
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        lanes = self.lanes
+        now = time.time()
+        # lanes whose producer went quiet are standing still
+        for lane in lanes.expire(now, self.SPEED_TIMEOUT):
+            self.display.set(lane, SPEED, "0.0")
+        # auto-pause/resume and elapsed time for every lane in one pass
+        elapsed = lanes.advance(now)
+        self.display.render(lanes, elapsed)
+        self.schedule_tick(now)
 
+    def schedule_tick(self, now):
+        """Arm the tick for the next timer second, expiry or pause; idle if none."""
+        wait = self.lanes.next_change(now, self.SPEED_TIMEOUT)
+        if wait is None:
+            self.timer.stop()
+            return
+        due = now + wait
+        if self.timer.isActive() and self._tick_due <= due:
+            return
+        self._tick_due = due
+        # land just past the boundary so the new second is already due
+        self.timer.start(math.ceil(wait * 1000) + 1)
 
+    @timed(DISPLAY_SECONDS.labels('update_digits_display'))
     def update_digits_display(self, data):
         try:
-            column = str(data[0])  # '1' for left, '2' for right
+            lane = int(data[0]) - 1  # column 1 is the first lane
             rotations = data[1]
+            sample_time = data[2] if len(data) > 2 else None
             
-            if column not in ('1', '2'):
+            if not 0 <= lane < self.lanes.count:
                 return
                 
-            speed = self.calculate_speed(column, rotations)
+            speed = self.calculate_speed(lane, rotations, sample_time)
+            if speed is None:
+                return
             
             # store last computed speed so update_timers can use it
-            self.current_speed[column] = speed
+            lanes = self.lanes
+            now = time.time()
+            lanes.speed[lane] = speed
+            lanes.last_seen[lane] = now
 
             # if speed > 0 ensure timer is started or resumed
             if speed > 0:
-               self.zero_since[column] = None
-               if not self.active_timers[column]:
-                   # start new timer
-                   self.start_times[column] = time.time()
-                   self.elapsed_acc[column] = 0.0
-                   self.paused[column] = False
-                   self.active_timers[column] = True
-               elif self.paused[column]:
-                   # resume paused timer
-                   self.start_times[column] = time.time()
-                   self.paused[column] = False
-
-            # Update the appropriate column
-            labels = self.left_labels if column == '1' else self.right_labels
-            
-            # Update speed (first digit)
-            if labels:
-                labels[0].setText(f"{speed}")
-            
-            # Update internal tracking
-            self.prev_rotations[column] = rotations
-            self.flash_digit_background()
+                lanes.start(lane, now)
+
+            # Update speed (first digit) and the path it added
+            self.display.set(lane, SPEED, f"{speed}")
+            if lanes.active[lane]:
+                self.display.set(lane, PATH, f"{lanes.total_path[lane]:.2f}")
+            self.flash_digit_background(lane)
+            self.schedule_tick(now)
             
         except Exception as e:
             print(f"Error updating display: {e}")
 
-    def flash_digit_background(self):
-        flash_style = """
-            QLabel {
-                color: #ffffff;
-                min-width: 10;
-                min-height: 10px;
-                font-weight: bold;
-            }
-        """
-        normal_style = """
-            QLabel {
-                color: #ffffff;
-                min-width: 10px;
-                min-height: 10px;
-                font-weight: bold;
-            }
-        """
-        for lbl in self.left_labels + self.right_labels:
-            lbl.setStyleSheet(flash_style)
-        QTimer.singleShot(180, lambda: [lbl.setStyleSheet(normal_style) for lbl in self.left_labels + self.right_labels])
+    def show_latest(self):
+        for data in self.latest.drain():
+            self.update_digits_display(data)
+
+    @traced()
+    def flash_digit_background(self, lane):
+        # highlight the lane's speed digits briefly; an overlay, not a restyle
+        self.lane_labels[lane][0].flash(180)
 
     def start_data_polling(self):
         self.poll_timer = QTimer()
         self.poll_timer.timeout.connect(self.fetch_latest_data)
         self.poll_timer.start(1000)
 
+    @traced()
     def fetch_latest_data(self):
+        @traced('fetch_latest_data.request')
         def fetch_thread():
+            # only polling displays need requests; keep it out of startup
+            import requests
             try:
-                response = requests.get(self.server_url, timeout=5)
+                # a 304 means nothing changed since the last poll
+                headers = {'If-None-Match': self.data_etag} if self.data_etag else {}
+                started = time.perf_counter()
+                response = requests.get(self.server_url, headers=headers, timeout=5)
+                POLL_SECONDS.observe(time.perf_counter() - started)
                 if response.status_code == 200:
+                    self.data_etag = response.headers.get('ETag')
                     data = response.json()
                     latest_map = data.get('data', {})
                     # emit each column's latest digits if present
-                    for col_key in ('1', '2'):
-                        entry = latest_map.get(col_key)
+                    for entry in latest_map.values():
                         if entry and 'digits' in entry:
-                            self.signals.digits_received.emit(entry['digits'])
+                            sample_time = entry.get('sensor_timestamp', entry.get('timestamp'))
+                            self.signals.digits_received.emit(entry['digits'] + [sample_time])
                     self.signals.status_update.emit("ok")
             except requests.exceptions.RequestException:
                 pass
@@ -297,68 +273,187 @@ class DigitDisplayGUI(QMainWindow):
         thread.daemon = True
         thread.start()
 
+    def all_labels(self):
+        return [lbl for labels in self.lane_labels for lbl in labels]
+
     def clear_display(self):
-        self.current_digits = [0, 0, 0]
-        for lbl in self.left_labels + self.right_labels:
-            lbl.setText("0")
+        for lane, labels in enumerate(self.lane_labels):
+            for field in range(len(labels)):
+                self.display.set(lane, field, "0")
 
-def main():
-    # Create the Flask server in a separate thread
-    def start_flask_server():
-        from flask import Flask, request, jsonify
-        
-        app = Flask(__name__)
-        # store latest per column ('1' and '2')
-        last_by_column = {}
-        
-        @app.route('/api/data', methods=['POST'])
-        def receive_data():
+def create_app(ingest=None):
+    """Build the ingest Flask app on top of a speed.ingest.Ingest store."""
+    from flask import Flask, Response, request, jsonify
+
+    if ingest is None:
+        ingest = Ingest()
+    accept = ingest.accept
+    broadcaster = ingest.broadcaster
+
+    app = Flask(__name__)
+
+    @app.route('/api/data', methods=['POST'])
+    @timed(HANDLER_SECONDS.labels('receive_data'))
+    @traced()
+    def receive_data():
+        try:
+            data = request.get_json()
+            reading = parse_reading(data)
+
+            if reading is not None:
+                col_key = accept(*reading)
+                digits = data['digits']
+                print(f"📨 Received digits for column {col_key}: {digits}")
+                return jsonify({'status': 'success', 'received_digits': digits})
+            else:
+                return jsonify({'error': 'Invalid data format'}), 400
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/data/batch', methods=['POST'])
+    @timed(HANDLER_SECONDS.labels('receive_batch'))
+    def receive_batch():
+        try:
+            # validate the whole batch before applying any of it
+            samples, error = parse_batch(request.get_json())
+            if error is not None:
+                return jsonify(error), 400
+
+            for sample in samples:
+                accept(*sample)
+            print(f"📨 Received batch of {len(samples)} samples")
+            return jsonify({'status': 'success', 'accepted': len(samples)})
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/data', methods=['GET'])
+    @timed(HANDLER_SECONDS.labels('get_data'))
+    def get_data():
+        # return the latest per column ('1' and '2'); supports If-None-Match,
+        # ?since=<seq> for changed lanes only and ?wait=<s> to long-poll
+        store = ingest.store
+        try:
+            since, wait = parse_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if_none_match = request.headers.get('If-None-Match')
+        if wait:
+            known = store.known_seq(if_none_match, since)
+            if known is not None:
+                store.wait(known, wait)
+        status, etag, body = store.response(if_none_match, since)
+        return Response(body, status=status, mimetype='application/json', headers={'ETag': etag})
+
+    @app.route('/api/history')
+    @timed(HANDLER_SECONDS.labels('get_history'))
+    def get_history():
+        # per-lane speed/distance rollups, see speed.history
+        try:
+            lane, start, end, step = parse_history_query(request.args)
+            return jsonify(ingest.history.query(lane, start, end, step))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    @app.route('/api/stream')
+    def stream():
+        # Server-Sent Events: one "data:" line per accepted sample
+        sub = broadcaster.subscribe()
+
+        def events():
             try:
-                data = request.get_json()
-                digits = data.get('digits', [])
-                
-                if len(digits) == 2 and all(isinstance(x, (int, float)) for x in digits):
-                    # normalize column key as string '1' or '2'
-                    col_key = str(int(digits[0]))
-                    last_by_column[col_key] = {
-                        'digits': [int(digits[0]), float(digits[1])],
-                        'timestamp': time.time()
-                    }
-                    print(f"📨 Received digits for column {col_key}: {digits}")
-                    return jsonify({'status': 'success', 'received_digits': digits})
-                else:
-                    return jsonify({'error': 'Invalid data format'}), 400
-                    
-            except Exception as e:
-                return jsonify({'error': str(e)}), 500
-        
-        @app.route('/api/data', methods=['GET'])
-        def get_data():
-            # return the latest per column ('1' and '2')
-            return jsonify({
-                'total_received': len(last_by_column),
-                'data': last_by_column
-            })
-        
-        @app.route('/')
-        def home():
-            return '''
-            <h1>Digit Receiver Server</h1>
-            <p>Send POST requests to /api/data with JSON:</p>
-            <pre>{"digits": [1, 2, 3]}</pre>
-            <p><a href="/api/data">View received data</a></p>
-            '''
-        
-        print("🚀 Starting Flask server on http://localhost:65500")
-        app.run(host='0.0.0.0', port=65500, debug=False, use_reloader=False)
-    
-    # Start Flask server in background thread
-    server_thread = threading.Thread(target=start_flask_server)
-    server_thread.daemon = True
-    server_thread.start()
-    
+                yield 'retry: 1000\n\n'
+                while True:
+                    samples = sub.get(timeout=15)
+                    if not samples:
+                        # keep proxies and idle clients from timing out
+                        yield ': keep-alive\n\n'
+                        continue
+                    for sample in samples:
+                        yield f"data: {json.dumps(sample)}\n\n"
+            finally:
+                broadcaster.unsubscribe(sub)
+
+        return Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/metrics')
+    def metrics():
+        # Prometheus text format, see speed.metrics
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    @app.route('/')
+    def home():
+        return '''
+        <h1>Digit Receiver Server</h1>
+        <p>Send POST requests to /api/data with JSON:</p>
+        <pre>{"digits": [1, 120], "ts": 1700000000.0, "seq": 17}</pre>
+        <p>("ts" is the sensor time in seconds and "seq" a per-lane counter; both optional)</p>
+        <p>or batches to /api/data/batch:</p>
+        <pre>{"samples": [[1, 120, 1700000000.0, 17], [2, 98, 1700000000.0, 4]]}</pre>
+        <p><a href="/api/data">View received data</a></p>
+        <p><a href="/api/stream">Live stream (Server-Sent Events)</a></p>
+        <p><a href="/api/history?lane=1">Lane 1 history (last hour)</a></p>
+        <p><a href="/metrics">Metrics (Prometheus)</a></p>
+        '''
+
+    return app
+
+def start_flask_server(ingest=None, on_bound=None):
+    """Run the ingest server (blocking), see create_app.
+
+    on_bound is called once the port is bound, before serving.
+    """
+    from werkzeug.serving import make_server
+
+    app = create_app(ingest)
+    server = make_server('0.0.0.0', 65500, app, threaded=True)
+    if on_bound is not None:
+        on_bound()
+    print("🚀 Starting Flask server on http://localhost:65500")
+    server.serve_forever()
+
+def lane_count(value):
+    """argparse type for --lanes: a whole number, at least one."""
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError("at least one lane is needed")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Digit display with embedded ingest server")
+    parser.add_argument('--lanes', type=lane_count, default=2,
+                        help="number of lanes (bikes) to display")
+    parser.add_argument('--estimator', choices=sorted(ESTIMATORS), default='two-point',
+                        help="speed estimator: two-point difference, windowed least squares or EWMA")
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help="append every accepted sample to a binary session log (see speed.recorder)")
+    parser.add_argument('--server', choices=['flask', 'asyncio'], default='flask',
+                        help="ingest server: Flask development server, or the asyncio "
+                             "server for many concurrent sensors (see speed.aio_server)")
+    parser.add_argument('--udp-port', type=int, default=None,
+                        help="also accept binary readings over UDP on this port (see speed.udp)")
+    parser.add_argument('--timeline', metavar='PATH', default=None,
+                        help="write the startup timeline (ms from launch to each milestone) as JSON")
+    parser.add_argument('--trace', metavar='PATH', default=os.environ.get(tracing.ENV),
+                        help=f"record spans and GC pauses, write them as Chrome trace JSON on exit "
+                             f"(default: ${tracing.ENV}, see speed.tracing)")
+    parser.add_argument('--profile', metavar='PATH', default=None,
+                        help="cProfile the GUI thread and write the stats to PATH")
+    parser.add_argument('--profile-window', type=float, default=10.0, metavar='SECONDS',
+                        help="length of each profile (default 10 s)")
+    parser.add_argument('--profile-every', type=float, default=0.0, metavar='SECONDS',
+                        help="repeat the profile this often, numbering the files (default: once)")
+    args, qt_args = parser.parse_known_args()
+    timeline = Timeline(STARTED)
+    timeline.mark('imports')
+    if args.trace:
+        tracing.enable()
+
     # Start the GUI application
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    timeline.mark('qapplication')
     
     # Set application-wide dark palette
     dark_palette = QPalette()
@@ -377,15 +472,88 @@ def main():
     dark_palette.setColor(QPalette.HighlightedText, Qt.black)
     app.setPalette(dark_palette)
     
-    window = DigitDisplayGUI()
+    # Ingest and display share this process: readings are pushed into the
+    # GUI instead of being polled back over HTTP. Only the newest reading
+    # per lane waits for the GUI thread, so a flood of samples cannot pile
+    # up in the Qt event queue
+    window = DigitDisplayGUI(poll=False, lanes=args.lanes, estimator=args.estimator)
+    timeline.mark('window_built')
+
+    history = History(estimator=args.estimator, circle_length=window.CIRCLE_LENGTH, lanes=args.lanes)
+    ingest = Ingest(on_digits=window.latest.push, history=history)
+    recorder = None
+    if args.record:
+        from speed.recorder import SessionRecorder
+        recorder = SessionRecorder(args.record)
+        ingest.add_listener(recorder.record)
+        print(f"💾 Recording session to {args.record}")
+
+    def server_bound():
+        # runs on the server thread
+        timeline.mark('server_bound')
+        print(f"⏱️ Startup: {timeline.summary()}")
+        if args.timeline:
+            timeline.write(args.timeline)
+
+    servers_started = False
+
+    def start_servers():
+        nonlocal servers_started
+        if servers_started:
+            return
+        servers_started = True
+        # Start the ingest server in background thread
+        if args.server == 'asyncio':
+            from speed.aio_server import start_async_server
+            server_thread = threading.Thread(target=start_async_server, args=(ingest,),
+                                             kwargs={'on_bound': server_bound})
+        else:
+            server_thread = threading.Thread(target=start_flask_server, args=(ingest, server_bound))
+        server_thread.daemon = True
+        server_thread.start()
+
+        if args.udp_port is not None:
+            from speed.udp import UdpListener
+            udp = UdpListener(ingest, port=args.udp_port)
+            udp_thread = threading.Thread(target=udp.serve_forever)
+            udp_thread.daemon = True
+            udp_thread.start()
+
+    profile = None
+    if args.profile:
+        profile = ProfileWindow(args.profile, args.profile_window, args.profile_every)
+        profile_timer = QTimer()
+        profile_timer.timeout.connect(profile.poll)
+
+    def first_frame():
+        timeline.mark('first_paint')
+        # the server threads import Flask/asyncio and would compete with the
+        # GUI thread for the GIL; let the first frame reach the screen first
+        QTimer.singleShot(0, start_servers)
+        if profile is not None:
+            profile.poll()
+            profile_timer.start(250)
+
+    window.centralWidget().first_paint.connect(first_frame)
+    # a window that never paints (minimized, no screen) must still receive data
+    QTimer.singleShot(2000, start_servers)
+
     # window.setScreen(app.screens()[1])  # Set to second monitor if available
     # screen = window.screen()
 
     # window.move(screen.geometry().topLeft())
     window.showFullScreen()
+    timeline.mark('window_shown')
     print("🎯 GUI Application started!")
     
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if recorder is not None:
+        recorder.close()
+    if profile is not None:
+        profile.stop()
+    if args.trace:
+        tracing.write(args.trace)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
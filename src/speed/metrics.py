@@ -0,0 +1,252 @@
+"""In-process metrics with Prometheus text exposition.
+
+    from speed.metrics import REGISTRY
+    samples = REGISTRY.counter('speed_ingest_samples_total', "Samples applied", ['lane'])
+    samples.labels('1').inc()
+
+Recording takes no lock: every thread adds into its own cell of each
+metric (a list found through threading.local), and a scrape sums the
+cells. A thread never shares its cell, so counts and histogram sums are
+exact, and an increment costs a thread-local lookup and an addition.
+Cells of finished threads are folded into a base total when another
+thread first records, so per-request threads do not pile up cells.
+Hot paths should look up their labelled child once and keep it.
+Values that already live elsewhere (reorder counters, queue drops) are
+exported through collectors called at scrape time instead.
+render() produces the /metrics body; serve() runs a standalone /metrics
+endpoint for processes without a web server of their own (sport.py).
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# seconds; spans sub-millisecond handlers up to multi-second OCR and polls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _PerThread:
+    """Values kept as one cell (a list) per recording thread, summed on read."""
+    __slots__ = ('_zero', '_local', '_cells', '_base', '_lock')
+
+    def __init__(self, zero):
+        self._zero = zero
+        self._local = threading.local()
+        self._cells = {}  # thread -> its cell
+        self._base = list(zero)  # totals of finished threads
+        self._lock = threading.Lock()
+
+    def _new_cell(self):
+        # first record from this thread
+        cell = list(self._zero)
+        with self._lock:
+            for thread, old in list(self._cells.items()):
+                if not thread.is_alive():
+                    # a finished thread writes no more; keep its counts in the base
+                    self._base = [a + b for a, b in zip(self._base, old)]
+                    del self._cells[thread]
+            self._cells[threading.current_thread()] = cell
+        self._local.cell = cell
+        return cell
+
+    def _total(self):
+        with self._lock:
+            total = list(self._base)
+            for cell in self._cells.values():
+                total = [a + b for a, b in zip(total, cell)]
+        return total
+
+
+class Counter(_PerThread):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__((0,))
+
+    def inc(self, amount=1):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[0] += amount
+
+    @property
+    def value(self):
+        return self._total()[0]
+
+
+class Histogram(_PerThread):
+    __slots__ = ('bounds',)
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # a count per bucket, the last one +Inf, then the sum
+        super().__init__((0,) * (len(bounds) + 1) + (0.0,))
+
+    def observe(self, value):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self):
+        total = self._total()
+        return total[:-1], total[-1]
+
+
+class Family:
+    """A metric name with one child per combination of label values."""
+
+    def __init__(self, kind, name, help, label_names, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._unlabelled = self.labels()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    # unlabelled families can be used directly
+    def inc(self, amount=1):
+        self._unlabelled.inc(amount)
+
+    def observe(self, value):
+        self._unlabelled.observe(value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            if self.kind == 'counter':
+                lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_number(child.value)}")
+                continue
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(child.bounds + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, [le])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, kind, name, help, label_names, factory):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = Family(kind, name, help, label_names, factory)
+            elif family.kind != kind or family.label_names != tuple(label_names):
+                raise ValueError(f"metric {name} already registered differently")
+            return family
+
+    def counter(self, name, help, label_names=()):
+        return self._register('counter', name, help, label_names, Counter)
+
+    def histogram(self, name, help, label_names=(), buckets=DEFAULT_BUCKETS):
+        buckets = tuple(sorted(buckets))
+        return self._register('histogram', name, help, label_names, lambda: Histogram(buckets))
+
+    def add_collector(self, fn):
+        """Export values computed at scrape time.
+
+        fn() returns an iterable of (name, kind, help, [(labels dict, value)]),
+        kind being 'counter' or 'gauge'.
+        """
+        with self._lock:
+            self._collectors.append(fn)
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            families = list(self._families.values())
+            collectors = list(self._collectors)
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        for fn in collectors:
+            for name, kind, help, samples in fn():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def timed(metric):
+    """Decorator observing the wrapped call's duration in seconds into metric."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def serve(port, host='0.0.0.0', registry=REGISTRY):
+    """Serve GET /metrics from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes every few seconds would flood the console
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,192 @@
+"""Template-matching digit recognizer for fixed-font meter displays.
+
+    python -m speed.recognizer learn digits.npz frame1.png=1234 frame2.png=567
+    python -m speed.recognizer check digits.npz frame3.png=890 frame4.png=1203
+
+Frames are binary images like the *-processed.png frames of sport.py's
+diagnostics dumps (preprocess_image_for_ocr output). learn cuts each
+frame into digits and averages the glyphs per digit into templates;
+check recognizes frames with known values and reports accuracy,
+confidence and time per frame.
+
+Recognition splits the frame into digits with connected components
+(cutting components wider than one digit, i.e. touching neighbours, by
+the learned digit aspect ratio), scales each to the template size and
+scores it against every template at once as normalized cross-correlation
+(one matrix product). The value's confidence is the score of its least
+certain digit, in [-1, 1].
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+TEMPLATE_SIZE = (12, 20)  # (width, height) every glyph is scaled to
+
+
+class TemplateRecognizer:
+    def __init__(self, size=TEMPLATE_SIZE, min_area=4, min_height=0.5, aspect=0.75):
+        self.size = size
+        # width / height of one digit; wider components are touching digits
+        self.aspect = aspect
+        self.min_area = min_area
+        # components shorter than this share of the tallest one are noise
+        # (or a decimal point) and are dropped
+        self.min_height = min_height
+        self.labels = np.empty(0, dtype='<U1')
+        self.templates = np.empty((0, size[0] * size[1]), dtype=np.float32)
+        self._sums = {}
+        self._counts = {}
+        self._aspects = []
+
+    def segment(self, binary):
+        """Bounding boxes (x0, y0, x1, y1) of the digits, left to right."""
+        if cv2.countNonZero(binary) * 2 > binary.size:
+            binary = cv2.bitwise_not(binary)  # digits must be the minority
+        n, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        stats = stats[1:]  # label 0 is the background
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+        if not len(stats):
+            return binary, []
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        stats = stats[heights >= self.min_height * heights.max()]
+        stats = stats[np.argsort(stats[:, cv2.CC_STAT_LEFT], kind='stable')]
+        boxes = []
+        for x, y, w, h, _ in stats:
+            x1, y1 = x + w, y + h
+            # a glyph broken into pieces stacked over each other is one digit
+            if boxes and x < boxes[-1][2]:
+                bx0, by0, bx1, by1 = boxes[-1]
+                boxes[-1] = (bx0, min(by0, y), max(bx1, x1), max(by1, y1))
+            else:
+                boxes.append((x, y, x1, y1))
+        return binary, [piece for box in boxes for piece in self._split(box)]
+
+    def _split(self, box):
+        x0, y0, x1, y1 = box
+        pieces = int(round((x1 - x0) / ((y1 - y0) * self.aspect)))
+        if pieces < 2:
+            return [box]
+        edges = np.linspace(x0, x1, pieces + 1).round().astype(int)
+        return [(a, y0, b, y1) for a, b in zip(edges[:-1], edges[1:])]
+
+    def glyphs(self, binary):
+        """One zero-mean, unit-norm row per digit, shape (digits, width*height)."""
+        binary, boxes = self.segment(binary)
+        out = np.empty((len(boxes), self.size[0] * self.size[1]), dtype=np.float32)
+        for i, (x0, y0, x1, y1) in enumerate(boxes):
+            cell = cv2.resize(binary[y0:y1, x0:x1], self.size, interpolation=cv2.INTER_AREA)
+            out[i] = cell.reshape(-1)
+        out -= out.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        out /= np.where(norms > 0, norms, 1.0)
+        return out
+
+    def learn(self, binary, value):
+        """Add the frame's glyphs as examples of the digits of value.
+
+        Returns False (and learns nothing) if the frame does not split into
+        as many digits as value has.
+        """
+        digits = str(value)
+        _, boxes = self.segment(binary)
+        if len(boxes) != len(digits):
+            return False
+        # touching digits are cut into as many pieces as typical digit widths fit
+        self._aspects.extend((x1 - x0) / (y1 - y0) for x0, y0, x1, y1 in boxes)
+        self.aspect = float(np.median(self._aspects))
+        glyphs = self.glyphs(binary)
+        for ch, glyph in zip(digits, glyphs):
+            self._sums[ch] = self._sums.get(ch, 0.0) + glyph
+            self._counts[ch] = self._counts.get(ch, 0) + 1
+        self.labels = np.array(sorted(self._sums), dtype='<U1')
+        templates = np.stack([self._sums[ch] / self._counts[ch] for ch in self.labels])
+        templates -= templates.mean(axis=1, keepdims=True)
+        templates /= np.linalg.norm(templates, axis=1, keepdims=True)
+        self.templates = templates.astype(np.float32)
+        return True
+
+    def recognize(self, binary):
+        """Return (value, confidence); (None, 0.0) if there is nothing to read."""
+        if not len(self.templates):
+            raise RuntimeError("no templates: learn() or load() first")
+        glyphs = self.glyphs(binary)
+        if not len(glyphs):
+            return None, 0.0
+        scores = glyphs @ self.templates.T  # correlation of every glyph with every template
+        best = scores.argmax(axis=1)
+        confidence = float(scores[np.arange(len(best)), best].min())
+        return int(''.join(self.labels[best])), confidence
+
+    def save(self, path):
+        np.savez(path, labels=self.labels, templates=self.templates, size=np.array(self.size),
+                 aspect=np.array(self.aspect),
+                 counts=np.array([self._counts[ch] for ch in self.labels]))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        recognizer = cls(size=tuple(int(v) for v in data['size']), aspect=float(data['aspect']))
+        recognizer.labels = data['labels']
+        recognizer.templates = data['templates']
+        # keep learning on top of the loaded templates
+        for ch, template, count in zip(recognizer.labels, recognizer.templates, data['counts']):
+            recognizer._sums[str(ch)] = template * int(count)
+            recognizer._counts[str(ch)] = int(count)
+        return recognizer
+
+
+def read_frame(path):
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise SystemExit(f"cannot read {path}")
+    _, binary = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY)
+    return binary
+
+
+def _labelled(pairs):
+    for pair in pairs:
+        path, sep, value = pair.rpartition('=')
+        if not sep or not value.isdigit():
+            raise SystemExit(f"expected FRAME=VALUE, got {pair!r}")
+        yield path, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn or check digit templates")
+    parser.add_argument('command', choices=['learn', 'check'])
+    parser.add_argument('templates', help="template file (.npz)")
+    parser.add_argument('frames', nargs='+', metavar='FRAME=VALUE', help="binary frame and the number it shows")
+    args = parser.parse_args()
+
+    if args.command == 'learn':
+        try:
+            recognizer = TemplateRecognizer.load(args.templates)
+        except FileNotFoundError:
+            recognizer = TemplateRecognizer()
+        for path, value in _labelled(args.frames):
+            if not recognizer.learn(read_frame(path), value):
+                print(f"⚠️ {path}: digit count does not match {value}, skipped")
+        recognizer.save(args.templates)
+        print(f"💾 Templates for digits {''.join(recognizer.labels)} written to {args.templates}")
+        return
+
+    recognizer = TemplateRecognizer.load(args.templates)
+    results = []
+    elapsed = 0.0
+    for path, value in _labelled(args.frames):
+        binary = read_frame(path)
+        t = time.perf_counter()
+        got, confidence = recognizer.recognize(binary)
+        elapsed += time.perf_counter() - t
+        results.append({'frame': path, 'expected': int(value), 'got': got, 'confidence': round(confidence, 3)})
+    for r in results:
+        print(json.dumps(r))
+    correct = sum(r['got'] == r['expected'] for r in results)
+    print(f"{correct}/{len(results)} correct, {elapsed / len(results) * 1e6:.0f} µs per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Append-only binary log of every ingested sample.
+
+The file is a 32-byte header followed by fixed-width little-endian records
+(RECORD_DTYPE). Samples are buffered in memory and written by a background
+thread, so the ingest path never touches the disk. Recording to an
+existing log appends to it, after checking its header and dropping a
+record cut short by a crash. open_session() maps a
+log read-only and returns the records as a NumPy structured array; columns
+such as log['rotations'] are views into the mapping, not copies.
+"""
+import os
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b'SPEEDREC'
+VERSION = 1
+HEADER = struct.Struct('<8sII16x')
+
+RECORD_DTYPE = np.dtype([
+    ('lane', '<u4'),
+    ('reserved', '<u4'),
+    ('rotations', '<f8'),
+    ('server_ts', '<f8'),
+    ('sensor_ts', '<f8'),  # NaN when the producer sent no timestamp
+])
+
+
+class SessionRecorder:
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0  # samples lost to failed writes
+        self._file = _open_for_append(path)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._run, name='speed-recorder', daemon=True)
+        self._writer.start()
+
+    def record(self, lane, rotations, server_ts, sensor_ts=None):
+        """Queue one sample; called on the ingest path, never blocks on I/O."""
+        sample = (lane, 0, rotations, server_ts, np.nan if sensor_ts is None else sensor_ts)
+        with self._lock:
+            self._pending.append(sample)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                try:
+                    self._file.write(np.array(pending, dtype=RECORD_DTYPE).tobytes())
+                    self._file.flush()
+                except Exception:
+                    self.dropped += len(pending)
+                    raise
+                self.written += len(pending)
+
+    def close(self):
+        self._closed.set()
+        self._writer.join()
+        self._flush_logged()
+        self._file.close()
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self._flush_logged()
+
+    def _flush_logged(self):
+        # the writer thread must outlive a bad batch, or _pending grows forever
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ Session log {self.path}: write failed, {self.dropped} samples lost so far: {e}")
+
+
+def _check_header(header, path):
+    if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, RECORD_DTYPE.itemsize):
+        raise ValueError(f"{path} is not a version {VERSION} session log")
+
+
+def _open_for_append(path):
+    f = open(path, 'a+b')
+    try:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+            return f
+        f.seek(0)
+        _check_header(f.read(HEADER.size), path)
+        whole = HEADER.size + (size - HEADER.size) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        if whole != size:
+            # a crash cut the last record short; appending after it would
+            # shift every later record
+            f.truncate(whole)
+        return f
+    except BaseException:
+        f.close()
+        raise
+
+
+def open_session(path):
+    """Memory-map a session log; returns a read-only structured array."""
+    with open(path, 'rb') as f:
+        _check_header(f.read(HEADER.size), path)
+    # ignore a partly written trailing record
+    count = (os.path.getsize(path) - HEADER.size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
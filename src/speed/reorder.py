@@ -0,0 +1,89 @@
+import time
+
+SEQ_MOD = 1 << 32
+
+
+class ReorderBuffer:
+    """Small per-lane reorder window keyed by producer sequence number.
+
+    push() returns the samples that can be released, in sequence order.
+    A sample at or behind the last released sequence number is a duplicate
+    or arrived too late and is discarded. A sample ahead of a gap is held
+    until the gap fills, until more than depth samples are waiting, or
+    until the oldest waiting sample is max_delay seconds old; then the gap
+    is skipped and counted as lost. Repeats of a held sample count as
+    duplicates; anything behind the window, including repeats of samples
+    already released, counts as late.
+
+    A jump of more than resync in either direction is taken as a producer
+    restart and resets the window instead of discarding everything.
+    """
+
+    def __init__(self, depth=4, max_delay=0.05, resync=1000):
+        self.depth = depth
+        self.max_delay = max_delay
+        self.resync = resync
+        self.next_seq = None
+        self._held = {}  # seq -> (arrival, item)
+
+        self.duplicates = 0
+        self.late = 0
+        self.lost = 0
+
+    def push(self, seq, item, now=None):
+        if now is None:
+            now = time.monotonic()
+        seq %= SEQ_MOD
+        if self.next_seq is None:
+            self.next_seq = seq
+
+        ahead = (seq - self.next_seq) % SEQ_MOD
+        if ahead >= SEQ_MOD // 2:
+            if SEQ_MOD - ahead > self.resync:
+                self._restart(seq)
+            else:
+                self.late += 1
+                return []
+        elif ahead > self.resync:
+            self._restart(seq)
+        if seq in self._held:
+            self.duplicates += 1
+            return []
+        self._held[seq] = (now, item)
+        return self._release() + self.expire(now)
+
+    def expire(self, now=None):
+        """Give up on gaps that are holding samples for too long.
+
+        push() calls this itself; call it on a timer too if the producer
+        may go quiet right after a gap.
+        """
+        if now is None:
+            now = time.monotonic()
+        out = []
+        while self._held and (len(self._held) > self.depth
+                              or now - min(t for t, _ in self._held.values()) >= self.max_delay):
+            # stop waiting for the missing sequence numbers
+            first = min(self._held, key=lambda s: (s - self.next_seq) % SEQ_MOD)
+            self.lost += (first - self.next_seq) % SEQ_MOD
+            self.next_seq = first
+            out.extend(self._release())
+        return out
+
+    @property
+    def waiting(self):
+        return len(self._held)
+
+    def _release(self):
+        out = []
+        while self.next_seq in self._held:
+            out.append(self._held.pop(self.next_seq)[1])
+            self.next_seq = (self.next_seq + 1) % SEQ_MOD
+        return out
+
+    def _restart(self, seq):
+        self._held.clear()
+        self.next_seq = seq
+
+    def stats(self):
+        return {'duplicates': self.duplicates, 'late': self.late, 'lost': self.lost}
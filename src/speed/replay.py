@@ -0,0 +1,145 @@
+"""Replay recorded sessions against the ingest server.
+
+    python -m speed.replay session.rec --speed 10
+    python -m speed.replay stream.ndjson --speed 0      # as fast as possible
+
+Input is either a binary log from speed.recorder or NDJSON with one sample
+per line, in the shape /api/stream emits ({"lane", "value", "timestamp",
+"sensor_timestamp"}; "rotations", "server_ts" and "sensor_ts" are accepted
+too). Samples are scheduled on their original arrival times divided by
+--speed, with one sender thread and keep-alive session per lane so each
+lane keeps its own timing and order. Sensor timestamps are shifted to the
+replay start, so the displayed speed stays realistic at any --speed.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+from speed.recorder import MAGIC, open_session
+
+
+def load_session(path):
+    """Return {lane: (arrival_times, rotations, sensor_times)} sorted by arrival."""
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if binary:
+        log = open_session(path)
+        lane_ids, arrival, rotations, sensor = log['lane'], log['server_ts'], log['rotations'], log['sensor_ts']
+    else:
+        rows = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('data:'):
+                    line = line[5:].strip()  # raw SSE capture
+                if not line or line.startswith(':'):
+                    continue
+                s = json.loads(line)
+                server_ts = s.get('timestamp', s.get('server_ts'))
+                sensor_ts = s.get('sensor_timestamp', s.get('sensor_ts'))
+                rows.append((s['lane'], server_ts, s.get('value', s.get('rotations')),
+                             math.nan if sensor_ts is None else sensor_ts))
+        table = np.array(rows, dtype=float).reshape(-1, 4)
+        lane_ids, arrival, rotations, sensor = table.T
+
+    lanes = {}
+    for lane in np.unique(lane_ids):
+        mask = lane_ids == lane
+        order = np.argsort(arrival[mask], kind='stable')
+        lanes[int(lane)] = (arrival[mask][order], rotations[mask][order], sensor[mask][order])
+    return lanes
+
+
+class Replay:
+    def __init__(self, lanes, url, speed=1.0, timeout=5):
+        self.lanes = lanes
+        self.url = url
+        self.speed = speed
+        self.timeout = timeout
+        self.sent = 0
+        self.errors = Counter()
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+
+    def run(self):
+        # the first recorded sample maps onto this moment
+        self.start = time.time()
+        t0 = min((arrival[0] for arrival, _, _ in self.lanes.values() if len(arrival)), default=None)
+        if t0 is None:
+            self.elapsed = 0.0  # nothing recorded
+            return self.report()
+        threads = [threading.Thread(target=self._replay_lane, args=(lane, t0), daemon=True)
+                   for lane in self.lanes]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.elapsed = time.time() - self.start
+        return self.report()
+
+    def _replay_lane(self, lane, t0):
+        arrival, rotations, sensor = self.lanes[lane]
+        session = requests.Session()
+        offset = self.start - t0
+        sent = 0
+        errors = Counter()
+        max_lag = 0.0
+        for i in range(len(arrival)):
+            if self.speed > 0:
+                due = self.start + float(arrival[i] - t0) / self.speed
+                lag = time.time() - due
+                if lag < 0:
+                    time.sleep(-lag)
+                else:
+                    max_lag = max(max_lag, lag)
+            ts = arrival[i] if math.isnan(sensor[i]) else sensor[i]
+            payload = {'digits': [lane, float(rotations[i])], 'ts': float(ts) + offset}
+            try:
+                response = session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    sent += 1
+                else:
+                    errors[f"HTTP {response.status_code}"] += 1
+            except requests.exceptions.RequestException as e:
+                errors[type(e).__name__] += 1
+        session.close()
+        with self._lock:
+            self.sent += sent
+            self.errors.update(errors)
+            self.max_lag = max(self.max_lag, max_lag)
+
+    def report(self):
+        total = sum(len(arrival) for arrival, _, _ in self.lanes.values())
+        return {
+            'samples': total,
+            'sent': self.sent,
+            'errors': dict(self.errors),
+            'elapsed_s': round(self.elapsed, 3),
+            'throughput_rps': round(self.sent / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            'max_schedule_lag_s': round(self.max_lag, 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session to the ingest server")
+    parser.add_argument('session', help="binary session log or NDJSON file")
+    parser.add_argument('--url', default="http://localhost:65500/api/data")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="time scale: 1 = real time, 10 = ten times faster, 0 = as fast as possible")
+    args = parser.parse_args()
+
+    lanes = load_session(args.session)
+    total = sum(len(a) for a, _, _ in lanes.values())
+    print(f"▶️ Replaying {total} samples on {len(lanes)} lane(s) to {args.url} at "
+          f"{'max' if args.speed <= 0 else f'{args.speed:g}x'} speed")
+    print(json.dumps(Replay(lanes, args.url, args.speed).run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
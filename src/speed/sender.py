@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from speed.reorder import SEQ_MOD
+
+
+def _never_sent(error):
+    """True if the request failed before reaching the server (refused or connect timeout)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class Sender:
+    """Non-blocking reading sender shared by the producers.
+
+    send() only enqueues and returns immediately; a background worker
+    drains the queue over one keep-alive requests.Session, retrying
+    transient failures with exponential backoff.
+
+    With coalesce=True only the newest pending reading per lane is kept,
+    so a stalled server costs stale readings rather than memory or delay.
+    Otherwise up to max_pending readings are queued and the oldest one is
+    dropped on overflow.
+
+    With batch_size > 0 readings are posted to <url>/batch once batch_size
+    are pending or the oldest has waited max_age seconds.
+
+    Every reading carries its sensor timestamp and a per-lane sequence
+    number so the server can drop retried duplicates and reorder. Numbers
+    are assigned by the worker as readings are posted, so readings that
+    are coalesced away or dropped leave no gap for the server to wait on,
+    and they are reused after a post that certainly never reached the
+    server. Numbering starts from the millisecond clock, so a restarted
+    producer continues ahead of its previous run instead of looking like
+    a stream of repeats.
+
+    on_posted, if given, is called from the worker with the seconds each
+    successful post took, retries included.
+    """
+
+    def __init__(self, url, coalesce=True, max_pending=256, batch_size=0, max_age=1.0,
+                 retries=3, backoff=0.2, timeout=3, on_posted=None):
+        self.url = url
+        self.coalesce = coalesce
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.on_posted = on_posted
+
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self._seq = {}
+        # lane -> sample when coalescing, else a FIFO of samples
+        self._pending = OrderedDict() if coalesce else deque()
+        self._oldest_at = None
+        self._inflight = 0
+        self._flushing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name='speed-sender', daemon=True)
+        self._worker.start()
+
+    def send(self, column, rotations, sensor_ts=None):
+        """Queue a reading; never blocks on the network."""
+        sample = [column, rotations, time.time() if sensor_ts is None else sensor_ts]
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            if self.coalesce:
+                if self._pending.pop(column, None) is not None:
+                    self.dropped += 1
+                self._pending[column] = sample
+            else:
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popleft()
+                    self.dropped += 1
+                self._pending.append(sample)
+            self._cond.notify()
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been sent or given up on."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # wake a worker that is waiting for a batch to fill up
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing = False
+
+    def close(self, timeout=5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        self.session.close()
+
+    def stats(self):
+        with self._cond:
+            return {'sent': self.sent, 'dropped': self.dropped, 'failed': self.failed,
+                    'pending': len(self._pending)}
+
+    def _take(self):
+        # called with the condition held; returns samples to post or None on close
+        while True:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            if self.batch_size <= 0:
+                if self.coalesce:
+                    return [self._pending.popitem(last=False)[1]]
+                return [self._pending.popleft()]
+            waited = time.monotonic() - self._oldest_at
+            if (len(self._pending) >= self.batch_size or waited >= self.max_age
+                    or self._flushing or self._closed):
+                count = min(len(self._pending), self.batch_size)
+                if self.coalesce:
+                    return [self._pending.popitem(last=False)[1] for _ in range(count)]
+                return [self._pending.popleft() for _ in range(count)]
+            self._cond.wait(self.max_age - waited)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                samples = self._take()
+                if samples is None:
+                    return
+                if self._pending:
+                    self._oldest_at = time.monotonic()
+                self._inflight = len(samples)
+                numbered_from = self._number(samples)
+            started = time.perf_counter()
+            ok = self._post(samples)
+            if ok and self.on_posted is not None:
+                self.on_posted(time.perf_counter() - started)
+            with self._cond:
+                if ok:
+                    self.sent += len(samples)
+                else:
+                    self.failed += len(samples)
+                    if ok is None:
+                        # the server never saw these numbers; hand them out again
+                        for column, seq in numbered_from.items():
+                            if seq is None:
+                                del self._seq[column]
+                            else:
+                                self._seq[column] = seq
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _number(self, samples):
+        # called with the condition held; appends each sample's sequence
+        # number and returns the per-lane counters from before
+        before = {}
+        for sample in samples:
+            column = sample[0]
+            seq = self._seq.get(column)
+            before.setdefault(column, seq)
+            seq = int(time.time() * 1000) if seq is None else seq + 1
+            self._seq[column] = seq = seq % SEQ_MOD
+            sample.append(seq)
+        return before
+
+    def _post(self, samples):
+        """True once posted; False if given up, None if the server certainly did not apply them."""
+        applied_maybe = False
+        if self.batch_size > 0:
+            url, payload = self.url + '/batch', {'samples': samples}
+        else:
+            column, rotations, sensor_ts, seq = samples[0]
+            url, payload = self.url, {'digits': [column, rotations], 'ts': sensor_ts, 'seq': seq}
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                # a refused connection sent nothing; a timeout or reset may
+                # have come after the server applied the readings
+                applied_maybe = applied_maybe or not _never_sent(e)
+                continue
+            if response.status_code < 400:
+                return True
+            if response.status_code < 500:
+                # the server rejected the payload; retrying will not help
+                return None if not applied_maybe else False
+            applied_maybe = True
+        return None if not applied_maybe else False
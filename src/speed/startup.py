@@ -0,0 +1,33 @@
+import json
+import threading
+import time
+
+
+class Timeline:
+    """Milliseconds from process start to each startup milestone.
+
+    origin is a time.perf_counter() value taken as early as possible,
+    normally at the top of speed.main before anything heavy is imported.
+    Marks may come from any thread; only the first mark of a name counts.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            self.marks.setdefault(name, (now - self.origin) * 1000.0)
+
+    def as_dict(self):
+        with self._lock:
+            return {name: round(ms, 1) for name, ms in sorted(self.marks.items(), key=lambda m: m[1])}
+
+    def summary(self):
+        return ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.as_dict().items())
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump({'timestamp': time.time(), 'milestones_ms': self.as_dict()}, f, indent=2)
@@ -0,0 +1,147 @@
+import json
+import math
+import os
+import threading
+import time
+
+# longest a GET may wait for a change (?wait=)
+MAX_WAIT = 30.0
+
+
+class SnapshotStore:
+    """Thread-safe latest-value-per-lane store with a global version.
+
+    Every put() bumps seq and remembers which seq last touched each lane.
+    The full GET body is serialized at most once per change and reused
+    until the next write. Responses carry an ETag built from the seq, so
+    pollers can send If-None-Match and get a bodiless 304 while nothing
+    changes, ask for ?since=<seq> to receive only lanes changed after
+    that version, and add ?wait=<seconds> to long-poll for the next change.
+    """
+
+    def __init__(self):
+        # distinguishes this process's versions from a previous run's
+        self.epoch = os.urandom(4).hex()
+        self.seq = 0
+        self._entries = {}
+        self._lane_seq = {}
+        self._body = None
+        self._body_seq = -1
+        self._cond = threading.Condition()
+        self._async_waiters = []
+
+    def put(self, key, entry):
+        with self._cond:
+            self.seq += 1
+            self._entries[key] = entry
+            self._lane_seq[key] = self.seq
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_resolve, fut)
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self._entries)
+
+    def etag(self, seq=None):
+        return f'"{self.epoch}-{self.seq if seq is None else seq}"'
+
+    def _seq_from_etag(self, etag):
+        # the version a client already has, or None if it is not ours
+        if etag:
+            tag = etag.strip().removeprefix('W/').strip('"')
+            epoch, _, seq = tag.partition('-')
+            if epoch == self.epoch and seq.isdigit():
+                return int(seq)
+        return None
+
+    def _known_seq(self, if_none_match, since):
+        known = self._seq_from_etag(if_none_match)
+        if since is not None and since <= self.seq:
+            known = since if known is None else max(known, since)
+        return known
+
+    def wait(self, known, timeout):
+        """Block until seq moves past known or timeout; True if it did."""
+        deadline = time.monotonic() + min(timeout, MAX_WAIT)
+        with self._cond:
+            while self.seq <= known:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    async def async_wait(self, known, timeout):
+        """wait() for asyncio servers: parks a future instead of a thread."""
+        import asyncio  # only the asyncio server gets here; keep it off the GUI's startup path
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._cond:
+            if self.seq > known:
+                return True
+            self._async_waiters.append((loop, fut))
+        try:
+            await asyncio.wait_for(fut, min(timeout, MAX_WAIT))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            # on timeout or cancellation put() never took it; don't let it pile up
+            with self._cond:
+                if (loop, fut) in self._async_waiters:
+                    self._async_waiters.remove((loop, fut))
+
+    def response(self, if_none_match=None, since=None):
+        """Return (status, etag, body bytes) for a GET of the latest values.
+
+        status is 304 with an empty body when the client already has the
+        current version. With since, body holds only lanes changed later.
+        """
+        with self._cond:
+            known = self._known_seq(if_none_match, since)
+            etag = self.etag()
+            if known is not None and known >= self.seq:
+                return 304, etag, b''
+            if since is not None and known is not None:
+                changed = {k: e for k, e in self._entries.items() if self._lane_seq[k] > known}
+                return 200, etag, json.dumps({
+                    'seq': self.seq,
+                    'since': known,
+                    'total_received': len(self._entries),
+                    'data': changed
+                }).encode()
+            if self._body_seq != self.seq:
+                self._body = json.dumps({
+                    'seq': self.seq,
+                    'total_received': len(self._entries),
+                    'data': self._entries
+                }).encode()
+                self._body_seq = self.seq
+            return 200, etag, self._body
+
+    def known_seq(self, if_none_match=None, since=None):
+        """The version a conditional GET refers to, or None for a plain GET."""
+        with self._cond:
+            return self._known_seq(if_none_match, since)
+
+
+def _resolve(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+
+def parse_query(query):
+    """Extract (since, wait) from GET /api/data query arguments (a mapping)."""
+    since = query.get('since')
+    wait = query.get('wait')
+    try:
+        since = int(since) if since not in (None, '') else None
+        wait = float(wait) if wait not in (None, '') else 0.0
+    except ValueError:
+        wait = math.nan
+    if not math.isfinite(wait):
+        # nan would get past max() below and into Condition.wait
+        raise ValueError("since must be an integer and wait a number of seconds")
+    return since, max(wait, 0.0)
@@ -0,0 +1,67 @@
+import threading
+from collections import deque
+
+
+class Subscription:
+    """Per-subscriber bounded buffer.
+
+    When the buffer is full the oldest sample is dropped, so a slow reader
+    only ever loses its own backlog and never blocks the publisher.
+    """
+
+    def __init__(self, maxlen):
+        self._buf = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._buf) == self._buf.maxlen:
+                self.dropped += 1
+            self._buf.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Wait for samples and return all pending ones (empty list on timeout)."""
+        with self._cond:
+            if not self._buf:
+                self._cond.wait(timeout)
+            items = list(self._buf)
+            self._buf.clear()
+            return items
+
+
+class Broadcaster:
+    """Fan out every published sample to all current subscribers."""
+
+    def __init__(self, maxlen=256):
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._gone_dropped = 0  # drops of subscribers that have left
+        # replaced (not mutated) on subscribe/unsubscribe so publish can
+        # iterate without holding the lock
+        self._subs = ()
+
+    def subscribe(self):
+        sub = Subscription(self.maxlen)
+        with self._lock:
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subs:
+                self._gone_dropped += sub.dropped
+            self._subs = tuple(s for s in self._subs if s is not sub)
+
+    @property
+    def dropped(self):
+        """Samples dropped for slow subscribers, past and present."""
+        return self._gone_dropped + sum(sub.dropped for sub in self._subs)
+
+    def publish(self, item):
+        for sub in self._subs:
+            sub.put(item)
+
+    def __len__(self):
+        return len(self._subs)
@@ -0,0 +1,178 @@
+"""Opt-in span tracing and profiling for finding stutters.
+
+    python -m speed.main --trace trace.json --profile gui.prof
+    SPEED_TRACE=trace.json python sport.py
+
+Functions decorated with traced() record a span (start, duration,
+process and thread) each call once enable() has been called; spans are
+kept in a bounded in-memory buffer and written as Chrome trace-event
+JSON, which chrome://tracing and https://ui.perfetto.dev open as a
+per-thread timeline. Garbage collections are recorded as 'gc' spans, so
+a collection that lands in a display update is visible as such.
+
+While tracing is off a traced function costs one extra call and a
+global lookup (~0.25 µs); nothing is recorded. The traced functions run
+at most a few dozen times a second.
+
+ProfileWindow runs cProfile on the calling thread for a fixed window,
+once or repeatedly, and writes .prof files for pstats or snakeviz.
+"""
+import atexit
+import cProfile
+import functools
+import gc
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV = 'SPEED_TRACE'
+
+_recorder = None
+
+
+class Recorder:
+    def __init__(self, max_events=200_000):
+        # only needed for the process name; keep it off the untraced startup path
+        from multiprocessing import current_process
+        self.pid = os.getpid()
+        # (name, pid, tid, start ns, end ns, args); oldest spans fall off
+        self.events = deque(maxlen=max_events)
+        self.processes = {self.pid: current_process().name}
+        self.threads = {}  # (pid, tid) -> thread name
+        self._gc_started = None
+
+    def add(self, name, start, end, args=None):
+        tid = threading.get_native_id()
+        if (self.pid, tid) not in self.threads:
+            self.threads[(self.pid, tid)] = threading.current_thread().name
+        self.events.append((name, self.pid, tid, start, end, args))
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_started = time.perf_counter_ns()
+        elif self._gc_started is not None:
+            self.add('gc', self._gc_started, time.perf_counter_ns(),
+                     {'generation': info['generation'], 'collected': info['collected']})
+            self._gc_started = None
+
+    def chrome_trace(self):
+        events = [{'name': name, 'cat': 'gc' if name == 'gc' else 'speed', 'ph': 'X',
+                   'ts': start / 1000.0, 'dur': (end - start) / 1000.0, 'pid': pid, 'tid': tid,
+                   **({'args': args} if args else {})}
+                  for name, pid, tid, start, end, args in list(self.events)]
+        events.extend({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': name}}
+                      for pid, name in list(self.processes.items()))
+        events.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for (pid, tid), name in list(self.threads.items()))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def enable(path=None, max_events=200_000):
+    """Start recording spans; with a path, write the trace there at exit."""
+    global _recorder
+    if _recorder is not None:
+        if _recorder.pid == os.getpid():
+            return _recorder
+        # a forked child: start its own recording instead of the parent's copy
+        gc.callbacks.remove(_recorder.on_gc)
+    _recorder = Recorder(max_events)
+    gc.callbacks.append(_recorder.on_gc)
+    if path:
+        atexit.register(write, path)
+    return _recorder
+
+
+def enabled():
+    return _recorder is not None
+
+
+def traced(name=None):
+    """Decorator recording a span for every call while tracing is enabled."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorder.add(label, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+
+def drain():
+    """Take this process's recorded spans, e.g. to return them from a worker.
+
+    Returns (events, processes, threads) for merge(); all empty while
+    tracing is off.
+    """
+    if _recorder is None:
+        return [], {}, {}
+    events = []
+    while _recorder.events:
+        events.append(_recorder.events.popleft())
+    return events, dict(_recorder.processes), dict(_recorder.threads)
+
+
+def merge(drained):
+    """Add spans drain()ed in another process; perf_counter is system-wide."""
+    events, processes, threads = drained
+    if _recorder is None or not events:
+        return
+    _recorder.events.extend(events)
+    _recorder.processes.update(processes)
+    _recorder.threads.update(threads)
+
+
+def write(path):
+    if _recorder is None:
+        return
+    with open(path, 'w') as f:
+        json.dump(_recorder.chrome_trace(), f)
+    print(f"🧵 Trace ({len(_recorder.events)} spans) written to {path}")
+
+
+class ProfileWindow:
+    """cProfile the thread that calls poll() for `seconds`, every `every` seconds.
+
+    every=0 profiles once. poll() must be called regularly from the
+    thread to profile (cProfile only sees the thread that enabled it);
+    each window is written to path, numbered from the second one on.
+    """
+
+    def __init__(self, path, seconds=10.0, every=0.0):
+        self.path = path
+        self.seconds = seconds
+        self.every = every
+        self.windows = 0
+        self._profile = None
+        self._next = time.monotonic()
+
+    def poll(self):
+        now = time.monotonic()
+        if self._profile is None:
+            if self._next is not None and now >= self._next:
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+                self._next = now + self.every if self.every else None
+                self._stop_at = now + self.seconds
+        elif now >= self._stop_at:
+            self.stop()
+
+    def stop(self):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        root, ext = os.path.splitext(self.path)
+        path = self.path if not self.windows else f"{root}-{self.windows + 1}{ext}"
+        self._profile.dump_stats(path)
+        self._profile = None
+        self.windows += 1
+        print(f"🔬 Profile of {self.seconds:g} s written to {path}")
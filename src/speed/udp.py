@@ -0,0 +1,129 @@
+"""Binary UDP ingest for high-rate sensors.
+
+Every reading is one fixed-size little-endian record:
+
+    lane      uint16   1 or more
+    (pad)     2 bytes
+    seq       uint32   per-lane sequence number, wraps at 2**32
+    rotations float64
+    sensor_ts float64  seconds, sensor clock
+
+A datagram carries one or more records back to back. Sequence numbers go
+to the ingest's per-lane reorder buffer (speed.reorder), which drops
+duplicates and late records and counts gaps as lost.
+
+Run ``python -m speed.udp`` for a loopback load test against the HTTP path.
+"""
+import socket
+import struct
+import threading
+import time
+
+from speed.reorder import SEQ_MOD
+
+RECORD = struct.Struct('<HxxIdd')
+
+
+def pack_reading(lane, seq, rotations, sensor_ts):
+    return RECORD.pack(lane, seq % SEQ_MOD, rotations, sensor_ts)
+
+
+class UdpListener:
+    def __init__(self, ingest, host='0.0.0.0', port=65501, rcvbuf=1 << 20):
+        self.ingest = ingest
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+        self._closed = False
+
+        self.received = 0
+        self.malformed = 0
+
+    def handle(self, data):
+        if not data or len(data) % RECORD.size:
+            self.malformed += 1
+            return
+        accept = self.ingest.accept
+        for lane, seq, rotations, sensor_ts in RECORD.iter_unpack(data):
+            if not lane:
+                self.malformed += 1
+                continue
+            accept(lane, rotations, sensor_ts, seq)
+            self.received += 1
+
+    def serve_forever(self):
+        print(f"🚀 Listening for UDP readings on {self.address[0]}:{self.address[1]}")
+        buf = bytearray(65536)
+        view = memoryview(buf)
+        recv_into = self.sock.recv_into
+        while not self._closed:
+            try:
+                n = recv_into(buf)
+            except OSError:
+                if self._closed:
+                    break
+                raise
+            self.handle(view[:n])
+
+    def close(self):
+        self._closed = True
+        self.sock.close()
+
+    def stats(self):
+        return {'received': self.received, 'malformed': self.malformed,
+                'lanes': self.ingest.reorder_stats()}
+
+
+def _load_test(count, lanes):
+    import requests
+    from werkzeug.serving import make_server
+    from speed.ingest import Ingest
+    from speed.main import create_app
+
+    # UDP: one reading per datagram, same as a naive sensor would send
+    ingest = Ingest()
+    listener = UdpListener(ingest, host='127.0.0.1', port=0, rcvbuf=8 << 20)
+    threading.Thread(target=listener.serve_forever, daemon=True).start()
+    out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start = time.perf_counter()
+    for i in range(count):
+        out.sendto(pack_reading(i % lanes + 1, i // lanes, i, time.time()), listener.address)
+        if i % 256 == 255:
+            # let the receiver keep up instead of overflowing the socket buffer
+            while listener.received < i - 1024:
+                time.sleep(0)
+    while listener.received < count and time.perf_counter() - start < 10:
+        time.sleep(0.001)
+    udp_rate = listener.received / (time.perf_counter() - start)
+    listener.close()
+
+    # HTTP: the Flask app behind a real socket, one keep-alive session
+    server = make_server('127.0.0.1', 0, create_app(Ingest()), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/data"
+    session = requests.Session()
+    http_count = max(count // 20, 100)
+    start = time.perf_counter()
+    for i in range(http_count):
+        session.post(url, json={'digits': [i % lanes + 1, i]})
+    http_rate = http_count / (time.perf_counter() - start)
+    server.shutdown()
+    return udp_rate, http_rate, listener.stats()
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import io
+
+    parser = argparse.ArgumentParser(description="Loopback load test: UDP vs HTTP ingest")
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--lanes', type=int, default=2)
+    args = parser.parse_args()
+    # the HTTP handler logs every request; keep that out of the results
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        udp_rate, http_rate, stats = _load_test(args.count, args.lanes)
+    print(f"UDP : {udp_rate:10.0f} readings/s {stats}")
+    print(f"HTTP: {http_rate:10.0f} readings/s")
+    print(f"ratio: {udp_rate / http_rate:.1f}x")
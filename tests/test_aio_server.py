@@ -0,0 +1,144 @@
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+from speed.aio_server import AsyncIngestServer
+
+
+@pytest.fixture
+def server():
+    server = AsyncIngestServer(host='127.0.0.1', port=0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def conn(server):
+    sock = socket.create_connection(('127.0.0.1', server.port), timeout=5)
+    yield sock.makefile('rwb')
+    sock.close()
+
+
+def post(path, obj, version='1.1', headers=b''):
+    body = json.dumps(obj).encode()
+    return (b'POST %s HTTP/%s\r\nHost: x\r\nContent-Length: %d\r\n%s\r\n%s'
+            % (path.encode(), version.encode(), len(body), headers, body))
+
+
+def send(conn, data):
+    conn.write(data)
+    conn.flush()
+
+
+def read_response(conn):
+    """(status, headers with lower-case names, body); None once the server closed."""
+    status_line = conn.readline()
+    if not status_line:
+        return None
+    headers = {}
+    while (line := conn.readline()) != b'\r\n':
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = conn.read(int(headers['content-length']))
+    return int(status_line.split()[1]), headers, body
+
+
+def test_keep_alive_serves_many_requests_on_one_connection(conn, server):
+    for i in range(3):
+        send(conn, post('/api/data', {'digits': [1, i]}))
+        status, headers, body = read_response(conn)
+        assert status == 200 and 'connection' not in headers
+        assert json.loads(body)['received_digits'] == [1, i]
+    assert server.ingest.snapshot()['1']['digits'] == [1, 2]
+
+
+def test_pipelined_requests_are_answered_in_order(conn):
+    send(conn, b''.join(post('/api/data', {'digits': [1, i]}) for i in range(20))
+         + b'GET /nowhere HTTP/1.1\r\n\r\n')
+    for i in range(20):
+        status, _, body = read_response(conn)
+        assert status == 200 and json.loads(body)['received_digits'] == [1, i]
+    assert read_response(conn)[0] == 404
+
+
+def test_connection_close(conn):
+    send(conn, post('/api/data', {'digits': [1, 5]}, headers=b'Connection: close\r\n')
+         + post('/api/data', {'digits': [1, 6]}))
+    status, headers, _ = read_response(conn)
+    assert status == 200 and headers['connection'] == 'close'
+    assert read_response(conn) is None
+
+
+def test_http_10_keeps_the_connection_only_when_asked(conn):
+    send(conn, post('/api/data', {'digits': [1, 5]}, version='1.0', headers=b'Connection: keep-alive\r\n'))
+    status, headers, _ = read_response(conn)
+    assert status == 200 and headers['connection'] == 'keep-alive'
+    send(conn, post('/api/data', {'digits': [1, 6]}, version='1.0'))
+    status, headers, _ = read_response(conn)
+    assert status == 200 and headers['connection'] == 'close'
+    assert read_response(conn) is None
+
+
+def test_post_without_content_length_is_refused(conn):
+    send(conn, b'POST /api/data HTTP/1.1\r\nHost: x\r\n\r\n{"digits": [1, 5]}')
+    status, headers, _ = read_response(conn)
+    assert status == 411 and headers['connection'] == 'close'
+    assert read_response(conn) is None
+
+
+def test_get_without_content_length_has_no_body(conn):
+    send(conn, b'GET /api/data HTTP/1.1\r\n\r\nGET /api/data HTTP/1.1\r\n\r\n')
+    assert read_response(conn)[0] == 200
+    assert read_response(conn)[0] == 200
+
+
+@pytest.mark.parametrize('length', [b'-5', b'abc', b'+5', b'1_0', b''])
+def test_bad_content_length(conn, length):
+    send(conn, b'POST /api/data HTTP/1.1\r\nContent-Length: %s\r\n\r\n' % length)
+    status, headers, body = read_response(conn)
+    assert status == 400 and json.loads(body) == {'error': 'Bad Content-Length'}
+    assert headers['connection'] == 'close'
+
+
+def test_chunked_upload_gets_411(conn):
+    send(conn, b'POST /api/data HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n')
+    status, headers, _ = read_response(conn)
+    assert status == 411 and headers['connection'] == 'close'
+    assert read_response(conn) is None
+
+
+def test_if_none_match_gives_304_until_a_change(conn):
+    send(conn, post('/api/data', {'digits': [1, 5]}))
+    read_response(conn)
+    send(conn, b'GET /api/data HTTP/1.1\r\n\r\n')
+    status, headers, body = read_response(conn)
+    etag = headers['etag']
+    assert status == 200 and json.loads(body)['data']['1']['digits'] == [1, 5]
+    send(conn, b'GET /api/data HTTP/1.1\r\nIf-None-Match: %s\r\n\r\n' % etag.encode())
+    status, headers, body = read_response(conn)
+    assert (status, headers['etag'], body) == (304, etag, b'')
+    send(conn, post('/api/data', {'digits': [1, 6]}))
+    read_response(conn)
+    send(conn, b'GET /api/data HTTP/1.1\r\nIf-None-Match: %s\r\n\r\n' % etag.encode())
+    assert read_response(conn)[0] == 200
+
+
+@pytest.mark.parametrize('body', [b'{"digits": [1, ', b'[1, 5]', b'\xff\xfe', b'null'])
+def test_malformed_json_is_a_400_and_keeps_the_connection(conn, body):
+    for path in (b'/api/data', b'/api/data/batch'):
+        send(conn, b'POST %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (path, len(body), body))
+        status, headers, payload = read_response(conn)
+        assert status == 400 and json.loads(payload) == {'error': 'Invalid JSON'}
+        assert 'connection' not in headers
+    send(conn, post('/api/data', {'digits': [1, 5]}))
+    assert read_response(conn)[0] == 200
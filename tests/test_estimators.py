@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+import pytest
+
+from speed.estimators import (ESTIMATORS, EwmaEstimator, LeastSquaresEstimator, TwoPointEstimator,
+                              make_estimator)
+
+T0 = 1_700_000_000.0  # epoch seconds, as samples carry them
+
+
+def samples(count, seed=0):
+    rng = np.random.default_rng(seed)
+    t = T0 + np.cumsum(rng.uniform(0.05, 0.3, count))
+    r = 5000.0 + np.cumsum(rng.uniform(0.0, 4.0, count))
+    return t, r
+
+
+@pytest.mark.parametrize('count', [2, 5, 8, 9, 16, 17, 50])
+def test_least_squares_matches_polyfit(count):
+    # 8 is one full window (the origin moves to the newest sample), 9 the
+    # first eviction, 16 and 17 a second rebase and the evictions after it
+    window = 8
+    t, r = samples(count)
+    estimator = LeastSquaresEstimator(1, window)
+    for i in range(count):
+        rate = estimator.update(0, t[i], r[i])
+        lo = max(0, i + 1 - window)
+        if i >= 1:
+            expected = np.polyfit(t[lo:i + 1] - T0, r[lo:i + 1], 1)[0]
+            assert rate == pytest.approx(expected, rel=1e-9), i
+
+
+def test_least_squares_keeps_lanes_apart():
+    t, r = samples(20)
+    estimator = LeastSquaresEstimator(2, 4)
+    for i in range(20):
+        estimator.update(0, t[i], r[i])
+        estimator.update(1, t[i], 2 * r[i])
+    assert estimator.rate[1] == pytest.approx(2 * estimator.rate[0])
+
+
+def test_two_point():
+    estimator = TwoPointEstimator(1)
+    assert estimator.update(0, T0, 100.0) == 0.0
+    assert estimator.update(0, T0 + 0.5, 103.0) == pytest.approx(6.0)
+    # a repeated timestamp keeps the last rate
+    assert estimator.update(0, T0 + 0.5, 104.0) == pytest.approx(6.0)
+
+
+def test_ewma_weights_by_the_time_between_samples():
+    tau = 2.0
+    estimator = EwmaEstimator(1, tau=tau)
+    estimator.update(0, T0, 0.0)
+    # the first rate is the two-point rate
+    assert estimator.update(0, T0 + 1.0, 10.0) == pytest.approx(10.0)
+    # a sample long after the previous one weighs more than a close one:
+    # 0.1 s later at 20 rotations/s, then 3 s later at 10 rotations/s
+    expected = 10.0 + (1 - math.exp(-0.1 / tau)) * (20.0 - 10.0)
+    assert estimator.update(0, T0 + 1.1, 12.0) == pytest.approx(expected)
+    expected += (1 - math.exp(-3.0 / tau)) * (10.0 - expected)
+    assert estimator.update(0, T0 + 4.1, 42.0) == pytest.approx(expected)
+
+
+def test_ewma_steady_rate_stays_exact():
+    estimator = EwmaEstimator(1)
+    t = T0 + np.cumsum([0.1, 0.7, 0.05, 1.3, 0.2, 2.0])
+    for ti in t:
+        rate = estimator.update(0, ti, 3.0 * (ti - T0))
+    assert rate == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize('name', sorted(ESTIMATORS))
+def test_reset_forgets_the_lane(name):
+    estimator = make_estimator(name, 2, window=4)
+    t, r = samples(10)
+    for i in range(10):
+        estimator.update(0, t[i], r[i])
+        estimator.update(1, t[i], r[i])
+    estimator.reset(0)
+    assert estimator.rate[0] == 0.0 and estimator.rate[1] != 0.0
+    # after a counter restart the old samples must not leak into the rate
+    assert estimator.update(0, T0 + 100.0, 0.0) == 0.0
+    assert estimator.update(0, T0 + 101.0, 5.0) == pytest.approx(5.0)
+
+
+def test_make_estimator():
+    estimator = make_estimator('lsq', 3, window=5)
+    assert isinstance(estimator, LeastSquaresEstimator)
+    assert estimator.times.shape == (3, 5)
+    with pytest.raises(ValueError, match='two-point'):
+        make_estimator('kalman', 2)
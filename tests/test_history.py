@@ -0,0 +1,104 @@
+import numpy as np
+
+from speed.history import (COUNT, DIST_LAST, DIST_MAX, DIST_MIN, DIST_SUM, SPEED_LAST, SPEED_MAX,
+                           SPEED_MIN, SPEED_SUM, History, _merge)
+
+
+def test_unwritten_slots_are_not_buckets_before_the_epoch():
+    history = History()
+    history.record(1, 0, 5.0)
+    history.record(1, 1, 6.0)
+    # slots never written must not pass for bucket -1 (t = -1 s / -10 s)
+    result = history.query(1, -20, 10)
+    assert result['t'] == [5, 6] and result['count'] == [1, 1]
+    result = history.query(1)
+    assert result['t'] == [0] and result['count'] == [2]
+    # samples before 1970 are real buckets with negative numbers
+    history = History()
+    history.record(1, 0, -2.0)
+    history.record(1, 1, -1.0)
+    history.record(1, 2, 0.0)
+    assert history.query(1, -5, 5)['t'] == [-2, -1, 0]
+
+
+def test_only_configured_lanes_are_kept():
+    history = History(lanes=2)
+    for lane in (1, 2, 3, 0, -1, 1.5, 2.0, 10 ** 9):
+        history.record(lane, 1, 100.0)
+    assert history.lanes() == [1, 2]
+    assert history.query(3, 0, 200)['count'] == []
+
+
+T = 1_000_000.0
+
+
+def picked(span=None, step=None, start=None):
+    history = History()
+    history.record(1, 0, T)
+    result = history.query(1, start if start is not None else T - span, T, step)
+    return result['tier'], result['step']
+
+
+def test_tier_choice():
+    assert picked(span=600) == (1, 1)
+    assert picked(span=2000) == (1, 1)
+    # more than MAX_POINTS seconds: 10 s buckets
+    assert picked(span=3600) == (10, 10)
+    # 2520 buckets of 10 s are too many as well
+    assert picked(span=7 * 3600) == (60, 60)
+    # the 10 s ring keeps one day; two days of minutes are merged in pairs
+    assert picked(span=2 * 86400) == (60, 120)
+    # beyond every ring: the coarsest tier, merged down to MAX_POINTS
+    assert picked(span=30 * 86400) == (60, 60 * 22)
+    # an explicit step uses the coarsest tier not coarser than it that
+    # still reaches back to the start (the 1 s ring keeps 6 h)
+    assert picked(span=600, step=30) == (10, 30)
+    assert picked(span=600, step=0.5) == (1, 1)
+    assert picked(span=600, step=120) == (60, 120)
+    assert picked(span=7 * 3600, step=5) == (10, 10)
+
+
+def test_merge():
+    ids = np.array([0, 1, 2, 5, 6, 7])
+    rows = np.zeros((6, 9))
+    rows[:, COUNT] = [1, 2, 3, 4, 5, 6]
+    rows[:, SPEED_MIN] = rows[:, DIST_MIN] = [5, 3, 4, 9, 8, 7]
+    rows[:, SPEED_MAX] = rows[:, DIST_MAX] = [6, 7, 5, 10, 12, 11]
+    rows[:, SPEED_SUM] = rows[:, DIST_SUM] = [10, 20, 30, 40, 50, 60]
+    rows[:, SPEED_LAST] = rows[:, DIST_LAST] = [1, 2, 3, 4, 5, 6]
+    merged_ids, merged = _merge(ids, rows, 3)
+    # groups of three aligned to multiples of 3: {0, 1, 2}, {5}, {6, 7}
+    assert merged_ids.tolist() == [0, 1, 2]
+    assert merged[:, COUNT].tolist() == [6, 4, 11]
+    assert merged[:, SPEED_MIN].tolist() == merged[:, DIST_MIN].tolist() == [3, 9, 7]
+    assert merged[:, SPEED_MAX].tolist() == merged[:, DIST_MAX].tolist() == [7, 10, 12]
+    assert merged[:, SPEED_SUM].tolist() == merged[:, DIST_SUM].tolist() == [60, 40, 110]
+    assert merged[:, SPEED_LAST].tolist() == merged[:, DIST_LAST].tolist() == [3, 4, 6]
+    empty_ids, empty = _merge(ids[:0], rows[:0], 3)
+    assert len(empty_ids) == 0 and empty.shape == (0, 9)
+
+
+def test_query_merges_buckets_into_steps():
+    history = History(tiers=((1, 100),))
+    for t in range(10):
+        history.record(1, t, 1000.0 + t)
+    result = history.query(1, 1000, 1009, step=5)
+    assert result['t'] == [1000, 1005]
+    assert result['count'] == [5, 5]
+
+
+def test_ring_wraps_around():
+    history = History(tiers=((1, 5),))
+    for t in range(12):
+        history.record(1, t, 100.0 + t)
+    # the ring holds the last five buckets, the newest still open
+    result = history.query(1, 100, 111, step=1)
+    assert result['t'] == [107, 108, 109, 110, 111]
+    assert result['count'] == [1] * 5
+    assert result['distance']['last'] == [round(t * 20 / 100000.0, 4) for t in range(7, 12)]
+    # buckets whose slots were reused are gone, not shown with newer data
+    assert history.query(1, 100, 104, step=1)['t'] == []
+    # after a gap the skipped slots still hold buckets from before it
+    history.record(1, 12, 120.0)
+    history.record(1, 13, 121.0)
+    assert history.query(1, 117, 121, step=1)['t'] == [120, 121]
@@ -0,0 +1,47 @@
+import pytest
+
+from speed.ingest import MAX_LANE, Ingest, parse_batch, parse_reading
+from speed.main import create_app
+from speed.recorder import SessionRecorder, open_session
+from speed.udp import UdpListener, pack_reading
+
+
+@pytest.mark.parametrize('lane', [1, 2.0, MAX_LANE])
+def test_parse_reading_accepts_lanes(lane):
+    assert parse_reading({'digits': [lane, 5]}) == (lane, 5, None, None)
+
+
+@pytest.mark.parametrize('lane', [0, -1, 1.5, MAX_LANE + 1, float('nan'), float('inf'), True, '1'])
+def test_parse_reading_rejects_lanes_outside_the_log_range(lane):
+    assert parse_reading({'digits': [lane, 5]}) is None
+
+
+def test_parse_batch_rejects_a_bad_lane_anywhere():
+    assert parse_batch({'samples': [[1, 5], [2, 6, 100.0, 3]]}) == ([[1, 5], [2, 6, 100.0, 3]], None)
+    assert parse_batch({'samples': [[1, 5], [-1, 6]]}) == (None, {'error': 'Invalid data format', 'index': 1})
+    assert parse_batch({'samples': [[2 ** 32, 5]]})[1]['index'] == 0
+
+
+def test_http_refuses_bad_lanes_and_the_recording_survives(tmp_path):
+    ingest = Ingest()
+    recorder = SessionRecorder(str(tmp_path / 'session.log'))
+    ingest.add_listener(recorder.record)
+    client = create_app(ingest).test_client()
+    assert client.post('/api/data', json={'digits': [-1, 5]}).status_code == 400
+    assert client.post('/api/data', json={'digits': [2 ** 32, 5]}).status_code == 400
+    assert client.post('/api/data/batch', json={'samples': [[1, 5], [0, 6]]}).status_code == 400
+    assert client.post('/api/data', json={'digits': [1, 7]}).status_code == 200
+    recorder.close()
+    assert recorder.dropped == 0
+    assert list(open_session(str(tmp_path / 'session.log'))['rotations']) == [7.0]
+
+
+def test_udp_skips_records_for_lane_zero():
+    ingest = Ingest()
+    listener = UdpListener(ingest, host='127.0.0.1', port=0)
+    try:
+        listener.handle(pack_reading(0, 0, 5.0, 100.0) + pack_reading(1, 0, 6.0, 100.0))
+    finally:
+        listener.close()
+    assert (listener.received, listener.malformed) == (1, 1)
+    assert set(ingest.snapshot()) == {'1'}
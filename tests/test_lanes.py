@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from speed.lanes import Lanes
+
+
+def riding(count=2, now=100.0):
+    lanes = Lanes(count, now=now)
+    lanes.start(0, now)
+    lanes.speed[0] = 20.0
+    lanes.last_seen[0] = now
+    return lanes
+
+
+def test_advance_counts_whole_seconds_of_running_lanes():
+    lanes = riding()
+    assert lanes.advance(100.0).tolist() == [0, 0]
+    elapsed = lanes.advance(103.7)
+    assert elapsed.dtype == np.int64
+    assert elapsed.tolist() == [3, 0]
+
+
+def test_advance_pauses_a_stopped_lane_and_resumes_it():
+    lanes = riding()
+    lanes.speed[0] = 0.0
+    lanes.advance(110.0)  # starts the zero-speed clock
+    assert not lanes.paused[0]
+    assert lanes.advance(112.5).tolist() == [12, 0]
+    assert lanes.paused[0]
+    # paused time does not count
+    assert lanes.advance(130.0).tolist() == [12, 0]
+    lanes.speed[0] = 15.0
+    assert lanes.advance(130.0).tolist() == [12, 0]
+    assert not lanes.paused[0]
+    assert lanes.advance(135.0).tolist() == [17, 0]
+
+
+def test_advance_leaves_lanes_that_never_started_alone():
+    lanes = Lanes(3, now=0.0)
+    assert lanes.advance(50.0).tolist() == [0, 0, 0]
+    assert not lanes.paused.any()
+
+
+def test_next_change_is_none_when_idle():
+    assert Lanes(2).next_change(10.0, expire_after=5.0) is None
+
+
+def test_next_change_waits_for_the_next_whole_second():
+    lanes = riding()
+    lanes.advance(100.0)
+    assert lanes.next_change(100.3, expire_after=5.0) == pytest.approx(0.7)
+
+
+def test_next_change_waits_for_a_silent_lane_to_expire():
+    lanes = riding()
+    lanes.advance(100.0)
+    lanes.paused[0] = True  # only the expiry is left
+    lanes.start_time[0] = np.nan
+    assert lanes.next_change(101.5, expire_after=5.0) == pytest.approx(3.5)
+
+
+def test_next_change_waits_for_a_stopped_lane_to_pause():
+    lanes = riding()
+    lanes.speed[0] = 0.0
+    # advance() has not started the zero-speed clock yet: tick now
+    assert lanes.next_change(100.2, expire_after=5.0) == 0.0
+    lanes.advance(100.2)
+    assert lanes.next_change(100.5, expire_after=5.0) == pytest.approx(0.5)
+    lanes.advance(101.5)
+    assert lanes.next_change(101.5, expire_after=5.0) == pytest.approx(0.5)
+    # once paused nothing changes any more
+    lanes.advance(102.5)
+    assert lanes.next_change(102.5, expire_after=5.0) is None
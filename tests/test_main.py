@@ -0,0 +1,38 @@
+import argparse
+
+import pytest
+
+from speed.main import TWO_LANE_POSITIONS, lane_count, lane_layout
+
+
+def test_two_lanes_match_the_background_artwork():
+    assert lane_layout(2) == (150, TWO_LANE_POSITIONS)
+
+
+@pytest.mark.parametrize('count, per_row, rows', [(1, 1, 1), (3, 3, 1), (4, 4, 1), (5, 4, 2), (9, 4, 3)])
+def test_lanes_are_laid_out_in_rows_of_up_to_four(count, per_row, rows):
+    font_size, positions = lane_layout(count)
+    assert len(positions) == count
+    assert all(len(lane) == 3 for lane in positions)
+    xs = sorted({lane[0][0] for lane in positions})
+    ys = sorted({lane[1][1] for lane in positions})
+    assert len(xs) == per_row and len(ys) == rows
+    # every element stays on the 1920x1080 screen
+    assert all(0 <= x < 1920 and 0 <= y < 1080 for lane in positions for x, y in lane)
+    assert 12 <= font_size <= 150
+
+
+def test_many_lanes_keep_a_readable_font():
+    assert lane_layout(64)[0] == 12
+
+
+def test_lane_count():
+    assert lane_count('3') == 3
+    with pytest.raises(argparse.ArgumentTypeError):
+        lane_count('0')
+    with pytest.raises(argparse.ArgumentTypeError):
+        lane_count('-2')
+    with pytest.raises(ValueError):
+        lane_count('two')
+    with pytest.raises(ValueError):
+        lane_layout(0)
@@ -0,0 +1,61 @@
+import sys
+import threading
+
+from speed.metrics import Registry
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_counts_and_sums_are_exact_across_threads():
+    registry = Registry()
+    counter = registry.counter('c_total', "c").labels()
+    histogram = registry.histogram('h_seconds', "h", buckets=(0.5,)).labels()
+
+    def work():
+        for _ in range(20_000):
+            counter.inc()
+            counter.inc(2)
+            histogram.observe(0.25)
+            histogram.observe(1.0)
+
+    # switch threads as often as possible to provoke lost updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        run_threads(work, 4)
+    finally:
+        sys.setswitchinterval(interval)
+    assert counter.value == 4 * 20_000 * 3
+    assert histogram.snapshot() == ([80_000, 80_000], 4 * 20_000 * 1.25)
+
+
+def test_finished_threads_are_folded_into_the_total():
+    counter = Registry().counter('c_total', "c").labels()
+    for _ in range(50):
+        run_threads(counter.inc, 1)
+    counter.inc()
+    assert counter.value == 51
+    assert len(counter._cells) == 1
+
+
+def test_render():
+    registry = Registry()
+    registry.counter('requests_total', "Requests", ['lane']).labels(1).inc(3)
+    histogram = registry.histogram('latency_seconds', "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(2.0)
+    registry.add_collector(lambda: [('queue_depth', 'gauge', "Depth", [({}, 7)])])
+    lines = registry.render().splitlines()
+    assert 'requests_total{lane="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert 'latency_seconds_sum 2.05' in lines
+    assert 'latency_seconds_count 2' in lines
+    assert 'queue_depth 7' in lines
@@ -0,0 +1,122 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from speed.recognizer import TemplateRecognizer, read_frame
+
+FRAMES = os.path.join(os.path.dirname(__file__), 'frames')
+# binary frames like sport.py's *-processed.png, named <value>.png or <value>-<kind>.png:
+# synthetic fixed-pitch renders, -touching ones with neighbouring digits
+# overlapping by a pixel, and -screenshot ones cut from image.png (a real
+# screen capture) and run through sport.preprocess_image_for_ocr
+TRAINING = ('1234567890', '9876543210', '5555')
+
+
+def frame(name):
+    return read_frame(os.path.join(FRAMES, f'{name}.png'))
+
+
+@pytest.fixture(scope='module')
+def recognizer():
+    recognizer = TemplateRecognizer()
+    for value in TRAINING:
+        assert recognizer.learn(frame(value), value)
+    return recognizer
+
+
+def test_learn_builds_one_template_per_digit(recognizer):
+    assert ''.join(recognizer.labels) == '0123456789'
+    assert recognizer.templates.shape == (10, recognizer.size[0] * recognizer.size[1])
+    assert np.allclose(np.linalg.norm(recognizer.templates, axis=1), 1.0)
+
+
+def test_learn_skips_a_frame_with_the_wrong_digit_count():
+    recognizer = TemplateRecognizer()
+    assert not recognizer.learn(frame('5555'), '555')
+    assert len(recognizer.templates) == 0
+    assert recognizer.learn(frame('5555'), '5555')
+    assert ''.join(recognizer.labels) == '5'
+
+
+@pytest.mark.parametrize('name, value', [('140891', 140891), ('2208', 2208)])
+def test_recognize(recognizer, name, value):
+    got, confidence = recognizer.recognize(frame(name))
+    assert got == value
+    assert confidence > 0.9
+
+
+def test_segment_orders_digits_and_drops_the_decimal_point(recognizer):
+    _, boxes = recognizer.segment(frame('2208'))
+    assert len(boxes) == 4
+    assert [x0 for x0, _, _, _ in boxes] == sorted(x0 for x0, _, _, _ in boxes)
+    assert all(x1 <= next_x0 for (_, _, x1, _), (next_x0, _, _, _) in zip(boxes, boxes[1:]))
+
+
+@pytest.mark.parametrize('value', [1200, 8888, 98765, 11, 1111, 7118])
+def test_touching_digits_are_split(recognizer, value):
+    binary = frame(f'{value}-touching')
+    # the digits really do touch: fewer connected components than digits
+    assert cv2.connectedComponents(binary)[0] - 1 < len(str(value))
+    _, boxes = recognizer.segment(binary)
+    assert len(boxes) == len(str(value))
+    got, confidence = recognizer.recognize(binary)
+    assert got == value
+    assert confidence > 0.9
+
+
+@pytest.mark.parametrize('name, value', [('140891', 140891), ('8888-touching', 8888)])
+def test_inverted_polarity(recognizer, name, value):
+    binary = frame(name)
+    inverted = cv2.bitwise_not(binary)
+    assert recognizer.segment(inverted)[1] == recognizer.segment(binary)[1]
+    assert recognizer.recognize(inverted)[0] == value
+
+
+def test_blank_frame_and_no_templates(recognizer):
+    blank = np.zeros((20, 60), dtype=np.uint8)
+    assert recognizer.recognize(blank) == (None, 0.0)
+    with pytest.raises(RuntimeError):
+        TemplateRecognizer().recognize(frame('5555'))
+
+
+def test_save_and_load_keep_learning(recognizer, tmp_path):
+    path = str(tmp_path / 'digits.npz')
+    recognizer.save(path)
+    loaded = TemplateRecognizer.load(path)
+    assert np.array_equal(loaded.labels, recognizer.labels)
+    assert loaded.aspect == pytest.approx(recognizer.aspect)
+    assert loaded.recognize(frame('140891'))[0] == 140891
+    assert loaded.learn(frame('5555'), '5555')
+    assert loaded.recognize(frame('2208'))[0] == 2208
+
+
+@pytest.mark.parametrize('value', [24, 25])
+def test_screenshot_frames_segment_into_their_digits(value):
+    # anti-aliased light-on-dark text: after preprocessing the digits are
+    # the dark minority, and segment() flips them
+    binary = frame(f'{value}-screenshot')
+    assert cv2.countNonZero(binary) * 2 > binary.size
+    _, boxes = TemplateRecognizer().segment(binary)
+    assert len(boxes) == 2
+
+
+def test_screenshot_frames_are_read_back():
+    recognizer = TemplateRecognizer()
+    assert recognizer.learn(frame('24-screenshot'), '24')
+    assert recognizer.learn(frame('25-screenshot'), '25')
+    for value in (24, 25):
+        got, confidence = recognizer.recognize(frame(f'{value}-screenshot'))
+        assert got == value and confidence > 0.9
+
+
+def test_screenshot_digit_is_recognized_at_another_size():
+    # templates from the 40 px heading read the 14 px "2" of the bullet line
+    recognizer = TemplateRecognizer()
+    assert recognizer.learn(frame('24-screenshot'), '24')
+    binary = frame('25-screenshot')
+    _, boxes = recognizer.segment(binary)
+    first = binary[:, :boxes[0][2] + 1]
+    got, confidence = recognizer.recognize(first)
+    assert got == 2 and confidence > 0.7
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from speed.recorder import HEADER, RECORD_DTYPE, SessionRecorder, open_session
+
+
+def record(path, samples):
+    recorder = SessionRecorder(str(path))
+    for sample in samples:
+        recorder.record(*sample)
+    recorder.close()
+
+
+def test_round_trip_and_append(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, [(1, 10.0, 100.0), (2, 20.0, 101.0, 99.5)])
+    record(path, [(1, 11.0, 102.0)])
+    log = open_session(str(path))
+    assert list(log['lane']) == [1, 2, 1]
+    assert list(log['rotations']) == [10.0, 20.0, 11.0]
+    assert log['sensor_ts'][1] == 99.5
+
+
+def test_empty_session_has_no_records(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, [])
+    assert path.stat().st_size == HEADER.size
+    assert len(open_session(str(path))) == 0
+
+
+def test_partial_trailing_record_is_dropped_before_appending(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, [(1, 10.0, 100.0)])
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD_DTYPE.itemsize // 2))  # crash mid-write
+    record(path, [(1, 11.0, 101.0)])
+    assert path.stat().st_size == HEADER.size + 2 * RECORD_DTYPE.itemsize
+    assert list(open_session(str(path))['rotations']) == [10.0, 11.0]
+
+
+@pytest.mark.parametrize('content', [b'not a session log at all, but long enough', b'SPEED'])
+def test_other_files_are_refused_and_left_alone(tmp_path, content):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        SessionRecorder(str(path))
+    with pytest.raises(ValueError):
+        open_session(str(path))
+    assert path.read_bytes() == content
+
+
+def test_a_failed_write_is_counted_and_the_writer_keeps_going(tmp_path, capsys):
+    path = tmp_path / 'session.log'
+    recorder = SessionRecorder(str(path), flush_interval=0.01)
+    recorder.record(-1, 5.0, 100.0)  # does not fit the uint32 lane column
+    recorder.record(1, 6.0, 100.5)
+    deadline = time.monotonic() + 5
+    while not recorder.dropped and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert recorder.dropped == 2
+    assert recorder._writer.is_alive()
+    recorder.record(1, 7.0, 101.0)
+    recorder.close()
+    assert recorder.written == 1
+    assert list(open_session(str(path))['rotations']) == [7.0]
+    assert 'write failed' in capsys.readouterr().out
@@ -0,0 +1,70 @@
+from speed.reorder import SEQ_MOD, ReorderBuffer
+
+
+def push_all(buf, seqs, now=0.0):
+    out = []
+    for seq in seqs:
+        out += buf.push(seq, seq, now=now)
+    return out
+
+
+def test_in_order_samples_pass_straight_through():
+    buf = ReorderBuffer()
+    assert push_all(buf, [5, 6, 7]) == [5, 6, 7]
+    assert buf.waiting == 0
+    assert buf.stats() == {'duplicates': 0, 'late': 0, 'lost': 0}
+
+
+def test_gap_is_held_until_filled():
+    buf = ReorderBuffer()
+    assert push_all(buf, [1, 3, 4]) == [1]
+    assert buf.waiting == 2
+    assert buf.push(2, 2, now=0.0) == [2, 3, 4]
+    assert buf.stats()['lost'] == 0
+
+
+def test_duplicates_and_late_arrivals_are_dropped():
+    buf = ReorderBuffer()
+    push_all(buf, [1, 2, 4])
+    assert buf.push(4, 4, now=0.0) == []  # repeat of a held sample
+    assert buf.push(2, 2, now=0.0) == []  # repeat of a released one
+    assert buf.push(1, 1, now=0.0) == []
+    assert buf.stats() == {'duplicates': 1, 'late': 2, 'lost': 0}
+
+
+def test_gap_given_up_after_max_delay():
+    buf = ReorderBuffer(max_delay=0.05)
+    push_all(buf, [1, 4], now=0.0)
+    assert buf.expire(now=0.04) == []
+    assert buf.expire(now=0.05) == [4]
+    assert buf.stats()['lost'] == 2
+    # the skipped numbers are now behind the window
+    assert buf.push(2, 2, now=0.06) == []
+    assert buf.stats()['late'] == 1
+
+
+def test_gap_given_up_when_window_overflows():
+    buf = ReorderBuffer(depth=2, max_delay=10.0)
+    assert push_all(buf, [1, 3, 4]) == [1]
+    assert buf.push(5, 5, now=0.0) == [3, 4, 5]
+    assert buf.stats()['lost'] == 1
+
+
+def test_sequence_wraps_around():
+    buf = ReorderBuffer()
+    top = SEQ_MOD - 1
+    assert push_all(buf, [top - 1, top, 0, 1]) == [top - 1, top, 0, 1]
+    assert buf.push(top, top, now=0.0) == []
+    assert buf.stats()['late'] == 1
+    # a gap across the wrap is reordered too
+    buf = ReorderBuffer()
+    assert push_all(buf, [top, 1, 0]) == [top, 0, 1]
+
+
+def test_large_jump_resyncs_in_either_direction():
+    buf = ReorderBuffer(resync=1000)
+    push_all(buf, [100, 101])
+    assert buf.push(50_000, 'restarted', now=0.0) == ['restarted']
+    assert buf.push(50_001, 'next', now=0.0) == ['next']
+    assert buf.push(7, 'back', now=0.0) == ['back']
+    assert buf.stats() == {'duplicates': 0, 'late': 0, 'lost': 0}
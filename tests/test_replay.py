@@ -0,0 +1,34 @@
+import socket
+
+import numpy as np
+
+from speed.recorder import SessionRecorder
+from speed.replay import Replay, load_session
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/data"
+
+
+def test_empty_sessions_report_zeros(tmp_path):
+    log = tmp_path / 'empty.rec'
+    SessionRecorder(str(log)).close()
+    ndjson = tmp_path / 'empty.ndjson'
+    ndjson.write_text('')
+    for path in (log, ndjson):
+        report = Replay(load_session(str(path)), unused_url(), speed=0).run()
+        assert report['samples'] == 0
+        assert report['sent'] == 0
+        assert report['throughput_rps'] == 0.0
+
+
+def test_throughput_counts_only_delivered_samples():
+    lanes = {1: (np.array([0.0, 0.01]), np.array([1.0, 2.0]), np.full(2, np.nan))}
+    report = Replay(lanes, unused_url(), speed=0, timeout=1).run()
+    assert report['samples'] == 2
+    assert report['sent'] == 0
+    assert report['errors'] == {'ConnectionError': 2}
+    assert report['throughput_rps'] == 0.0
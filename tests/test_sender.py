@@ -0,0 +1,106 @@
+import threading
+import time
+
+import requests
+
+from speed.sender import Sender
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def recording_sender(post):
+    sender = Sender('http://sensor.invalid/api/data', retries=0, backoff=0)
+    sender.session.post = post
+    return sender
+
+
+def test_coalesced_readings_leave_no_sequence_gaps():
+    posted = []
+    first_post = threading.Event()
+    release = threading.Event()
+
+    def post(url, json, timeout):
+        posted.append(json['seq'])
+        first_post.set()
+        release.wait(5)
+        return FakeResponse()
+
+    sender = recording_sender(post)
+    sender.send(1, 0)
+    first_post.wait(5)
+    for rotations in range(1, 50):
+        sender.send(1, rotations)  # all but the newest are coalesced away
+    release.set()
+    assert sender.flush(5)
+    sender.close()
+    assert len(posted) == 2
+    assert posted[1] == posted[0] + 1
+    assert sender.stats()['dropped'] == 48
+
+
+def test_numbers_are_reused_after_a_refused_connection():
+    posted = []
+
+    def post(url, json, timeout):
+        posted.append(json['seq'])
+        if len(posted) == 1:
+            raise requests.exceptions.ConnectTimeout()
+        return FakeResponse()
+
+    sender = recording_sender(post)
+    sender.send(1, 10)
+    assert sender.flush(5)
+    sender.send(1, 11)
+    assert sender.flush(5)
+    sender.close()
+    assert posted[0] == posted[1]
+    assert sender.stats()['failed'] == 1 and sender.stats()['sent'] == 1
+
+
+def test_numbers_are_kept_when_the_server_may_have_applied_them():
+    posted = []
+
+    def post(url, json, timeout):
+        posted.append(json['seq'])
+        if len(posted) == 1:
+            raise requests.exceptions.ReadTimeout()
+        return FakeResponse()
+
+    sender = recording_sender(post)
+    sender.send(1, 10)
+    assert sender.flush(5)
+    sender.send(1, 11)
+    assert sender.flush(5)
+    sender.close()
+    assert posted[1] == posted[0] + 1
+
+
+def test_on_posted_times_the_post_not_the_enqueue():
+    timings = []
+
+    def post(url, json, timeout):
+        time.sleep(0.05)
+        return FakeResponse()
+
+    sender = recording_sender(post)
+    sender.on_posted = timings.append
+    sender.send(1, 10)
+    assert sender.flush(5)
+    sender.close()
+    assert len(timings) == 1 and timings[0] >= 0.05
+
+
+def test_on_posted_is_not_called_for_failed_posts():
+    timings = []
+
+    def post(url, json, timeout):
+        raise requests.exceptions.ConnectTimeout()
+
+    sender = recording_sender(post)
+    sender.on_posted = timings.append
+    sender.send(1, 10)
+    assert sender.flush(5)
+    sender.close()
+    assert timings == []
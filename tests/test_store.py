@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from speed.store import SnapshotStore, parse_query
+
+
+def body(response):
+    status, etag, data = response
+    return status, etag, json.loads(data) if data else None
+
+
+def test_etag_gives_304_until_the_next_put():
+    store = SnapshotStore()
+    store.put(1, {'value': 10})
+    status, etag, data = body(store.response())
+    assert status == 200 and data['data'] == {'1': {'value': 10}}
+    assert store.response(if_none_match=etag) == (304, etag, b'')
+    assert store.response(if_none_match=f'W/{etag}')[0] == 304
+    store.put(1, {'value': 11})
+    assert store.response(if_none_match=etag)[0] == 200
+
+
+def test_etag_of_another_run_is_ignored():
+    store = SnapshotStore()
+    store.put(1, {'value': 10})
+    other = SnapshotStore()
+    assert store.response(if_none_match=other.etag(1))[0] == 200
+
+
+def test_since_returns_only_changed_lanes():
+    store = SnapshotStore()
+    store.put(1, {'value': 10})
+    store.put(2, {'value': 20})
+    store.put(1, {'value': 11})
+    status, _, data = body(store.response(since=2))
+    assert status == 200
+    assert data['seq'] == 3 and data['since'] == 2
+    assert data['data'] == {'1': {'value': 11}}
+    assert data['total_received'] == 2
+    assert store.response(since=3)[0] == 304
+    # a version from the future (e.g. before a restart) gets the full body
+    assert body(store.response(since=99))[2]['data'].keys() == {'1', '2'}
+
+
+def test_wait_times_out_and_wakes_on_put():
+    store = SnapshotStore()
+    started = time.monotonic()
+    assert store.wait(0, 0.05) is False
+    assert time.monotonic() - started >= 0.05
+    threading.Timer(0.05, store.put, (1, {'value': 1})).start()
+    assert store.wait(0, 5) is True
+
+
+def test_async_wait_times_out_without_leaving_a_waiter():
+    store = SnapshotStore()
+
+    async def scenario():
+        assert await store.async_wait(0, 0.01) is False
+        task = asyncio.ensure_future(store.async_wait(0, 5))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert store._async_waiters == []
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, store.put, 1, {'value': 1})
+        assert await store.async_wait(0, 5) is True
+        assert await store.async_wait(0, 5) is True  # already past known
+
+    asyncio.run(scenario())
+    assert store._async_waiters == []
+
+
+def test_parse_query():
+    assert parse_query({}) == (None, 0.0)
+    assert parse_query({'since': '5', 'wait': '2.5'}) == (5, 2.5)
+    assert parse_query({'wait': '-1'}) == (None, 0.0)
+    with pytest.raises(ValueError):
+        parse_query({'since': 'x'})
+    for wait in ('nan', 'inf', '-inf', 'x'):
+        with pytest.raises(ValueError):
+            parse_query({'wait': wait})
+
+
+def test_non_finite_wait_is_a_400():
+    from speed.main import create_app
+    client = create_app().test_client()
+    assert client.get('/api/data?wait=nan').status_code == 400
+    assert client.get('/api/data?wait=inf').status_code == 400
@@ -0,0 +1,120 @@
+import gc
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from speed import tracing
+
+
+@tracing.traced('work')
+def work():
+    return 42
+
+
+def traced_in_worker():
+    tracing.enable()
+    threading.current_thread().name = 'worker-main'
+    work()
+    return tracing.drain()
+
+
+@pytest.fixture(autouse=True)
+def no_recorder(monkeypatch):
+    monkeypatch.setattr(tracing, '_recorder', None)
+    yield
+    if tracing._recorder is not None and tracing._recorder.on_gc in gc.callbacks:
+        gc.callbacks.remove(tracing._recorder.on_gc)
+
+
+def spans(recorder, name):
+    return [event for event in recorder.events if event[0] == name]
+
+
+def test_nothing_is_recorded_while_disabled():
+    assert work() == 42
+    assert not tracing.enabled()
+    assert tracing.drain() == ([], {}, {})
+
+
+def test_a_call_records_one_span_on_the_calling_thread():
+    recorder = tracing.enable()
+    before = time.perf_counter_ns()
+    assert work() == 42
+    (span,) = spans(recorder, 'work')
+    name, pid, tid, start, end, args = span
+    assert (pid, tid) == (os.getpid(), threading.get_native_id())
+    assert before <= start <= end <= time.perf_counter_ns()
+    assert args is None
+
+
+def test_chrome_trace_is_json_with_thread_names(tmp_path):
+    tracing.enable()
+    thread = threading.Thread(target=work, name='reader')
+    thread.start()
+    thread.join()
+    work()
+    path = tmp_path / 'trace.json'
+    tracing.write(path)
+    trace = json.loads(path.read_text())
+
+    events = [event for event in trace['traceEvents'] if event['name'] == 'work']
+    assert len(events) == 2
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+    names = {event['tid']: event['args']['name'] for event in trace['traceEvents']
+             if event['ph'] == 'M' and event['name'] == 'thread_name'}
+    assert names[threading.get_native_id()] == threading.current_thread().name
+    assert 'reader' in names.values()
+    assert {event['tid'] for event in events} <= set(names)
+
+
+def test_spans_drained_in_another_process_merge_into_this_one():
+    recorder = tracing.enable()
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        drained = pool.apply(traced_in_worker)
+    tracing.merge(drained)
+
+    (span,) = spans(recorder, 'work')
+    assert span[1] != os.getpid()
+    assert span[1] in recorder.processes
+    assert recorder.threads[(span[1], span[2])] == 'worker-main'
+    json.dumps(recorder.chrome_trace())
+
+
+def test_merge_ignores_spans_while_disabled():
+    tracing.merge(([('work', 1, 2, 0, 1, None)], {1: 'other'}, {(1, 2): 'main'}))
+    assert not tracing.enabled()
+
+
+def test_drain_empties_the_buffer():
+    tracing.enable()
+    work()
+    events, processes, threads = tracing.drain()
+    assert [event[0] for event in events].count('work') == 1
+    assert os.getpid() in processes
+    assert [event for event in tracing.drain()[0] if event[0] == 'work'] == []
+
+
+def test_profile_window_numbers_repeated_windows(tmp_path):
+    path = tmp_path / 'gui.prof'
+    window = tracing.ProfileWindow(str(path), seconds=0.01, every=0.03)
+    deadline = time.monotonic() + 5
+    while window.windows < 3 and time.monotonic() < deadline:
+        window.poll()
+        time.sleep(0.002)
+    assert window.windows == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['gui-2.prof', 'gui-3.prof', 'gui.prof']
+
+
+def test_profile_window_runs_once_without_every(tmp_path):
+    path = tmp_path / 'gui.prof'
+    window = tracing.ProfileWindow(str(path), seconds=0.01)
+    deadline = time.monotonic() + 0.2
+    while time.monotonic() < deadline:
+        window.poll()
+        time.sleep(0.002)
+    assert window.windows == 1
+    assert [p.name for p in tmp_path.iterdir()] == ['gui.prof']